@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+# pyplot keeps global state, so renders from different threads must not overlap
+render_lock = threading.Lock()
+
+class AsyncCycleTracker:
+    """asyncio wrapper around CycleTracker for async (Flet) event handlers
+
+    Blocking work (file I/O, statistics, matplotlib) runs in an executor,
+    so the event loop stays free for other sessions. Calls on one tracker
+    are serialized, so concurrent handlers can't mix their changes.
+    Other attributes are read from the wrapped tracker without any lock; UI code
+    should read the view data from snapshot() instead (statistics are computed
+    lazily on access, which must not overlap with the watcher/scheduler threads).
+    render_service: optional RenderService, plots are then rendered in its process pool
+    """
+    def __init__(self, tracker, executor=None, render_service=None):
+        self.tracker = tracker
+        self.executor = executor    # None = default executor of the loop
+        self.render_service = render_service
+        self.lock = asyncio.Lock()
+        self.thread_lock = threading.Lock()     # shared with threads outside the loop (TrackerWatcher)
+
+    def __getattr__(self, name):
+        return getattr(self.tracker, name)
+
+    async def _run(self, func, *args):
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    def _mutate(self, method, *args):
+        with self.thread_lock:
+            result = method(*args)
+            self.tracker.update_stats()   # statistics are ready before the UI reads them
+        return result
+
+    def _snapshot(self):
+        with self.thread_lock:
+            return {
+                'dates': self.tracker.dates['date'].tolist(),
+                'pred_date': self.tracker.pred_date,
+                'today': self.tracker.clock(),
+            }
+
+    async def snapshot(self):
+        """View data read under the lock: dates (chronological), pred_date, today"""
+        return await self._run(self._snapshot)
+
+    def _locked(self, method, *args):
+        with self.thread_lock:
+            return method(*args)
+
+    async def probability_table(self, horizon=60, bandwidth=0.0):
+        """CycleTracker.probability_table in the executor (it may rebuild the frames)"""
+        return await self._run(self._locked, self.tracker.probability_table, horizon, bandwidth)
+
+    def _render(self, method):
+        if self.tracker.renderer != "matplotlib":     # no pyplot, renders can overlap
+            with self.thread_lock:
+                return method()
+        with self.thread_lock, render_lock:
+            return method()
+
+    async def add_date(self, date_str):
+        return await self._run(self._mutate, self.tracker.add_date, date_str)
+
+    async def add_dates(self, dates):
+        return await self._run(self._mutate, self.tracker.add_dates, dates)
+
+    async def delete_date(self, date_str):
+        return await self._run(self._mutate, self.tracker.delete_date, date_str)
+
+    async def reload_if_changed(self):
+        return await self._run(self._mutate, self.tracker.reload_if_changed)
+
+    def _render_inputs(self, kind):
+        with self.thread_lock:
+            return self.tracker.render_inputs(kind)
+
+    async def _plot(self, kind):
+        if self.render_service is None:
+            return await self._run(self._render, getattr(self.tracker, f"plot_{kind}"))
+        inputs = await self._run(self._render_inputs, kind)
+        if inputs is None:
+            return None
+        return await asyncio.wrap_future(self.render_service.submit(inputs))
+
+    async def plot_pred(self):
+        return await self._plot("pred")
+
+    async def plot_raw(self):
+        return await self._plot("raw")
+
+    async def plot_latest(self, kind):
+        """Image to show now and an awaitable of the up-to-date one (None if the image is up to date)
+        With a render service, the previous image is returned while the new one is rendering
+        """
+        if self.render_service is None:
+            return await self._plot(kind), None
+        inputs = await self._run(self._render_inputs, kind)
+        if inputs is None:
+            return None, None
+        image, future = self.render_service.request(self, kind, inputs)
+        if future.done():
+            return await asyncio.wrap_future(future), None
+        return image, asyncio.wrap_future(future)
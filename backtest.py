@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from batch import pred_days, segment_quantiles
+
+# Rolling-origin backtest of the tracker prediction
+# Every past date of every user is an origin: the prediction is computed from the
+# dates known at that time (same rules as CycleTracker.process_data: last n_window
+# dates, deltas > gap_max cut, last n_recent clean deltas) and compared with the
+# date that really came next. Like the shifted rolling median in old/predictor.py,
+# but vectorized over all origins at once instead of one tracker per step.
+
+def origin_quantiles(days, offsets, n_window=36, n_recent=12, gap_max=35,
+        qs=(0.25, 0.5, 0.75), chunk=100_000):
+    """Quantiles of the recent clean deltas as known at every date (one row per date)
+    Returns (array n_dates x len(qs) with NaN where there are < 3 clean deltas, user id of each date)
+    """
+    days = np.asarray(days, dtype=np.int64)
+    counts = np.diff(offsets)
+    user = np.repeat(np.arange(len(counts)), counts)
+    delta = np.full(len(days), np.nan)
+    delta[1:] = np.diff(days)
+    delta[offsets[:-1][counts > 0]] = np.nan     # first date of every user
+    delta[delta > gap_max] = np.nan
+
+    # Deltas inside the window of origin i are at positions i - width + 1 ... i
+    width = n_window - 1
+    padded = np.concatenate([np.full(width, np.nan), delta])
+    padded_user = np.concatenate([np.full(width, -1), user])
+    result = np.full((len(days), len(qs)), np.nan)
+    for start in range(0, len(days), chunk):
+        rows = np.arange(start, min(start + chunk, len(days)))
+        cols = rows[:, None] + 1 + np.arange(width)[None, :]    # index into padded arrays
+        window = padded[cols]
+        window[padded_user[cols] != user[rows][:, None]] = np.nan
+        # Keep only the last n_recent clean deltas of each row
+        valid = ~np.isnan(window)
+        rank = np.cumsum(valid[:, ::-1], axis=1)[:, ::-1]
+        window[rank > n_recent] = np.nan
+        n_used = np.minimum(valid.sum(axis=1), n_recent)
+        window.sort(axis=1)                                 # NaN go last
+        starts = np.arange(len(rows)) * width
+        for k, q in enumerate(qs):
+            quantile = segment_quantiles(window.ravel(), starts, n_used, q)
+            quantile[n_used < 3] = np.nan
+            result[rows, k] = quantile
+    return result, user
+
+def backtest(days, offsets, n_window=36, n_recent=12, gap_max=35, q_low=0.25, q_high=0.75):
+    """Replay every user's history and score the prediction made at each date
+
+    Returns DataFrame with one row per origin that had a prediction:
+    user, origin, actual (next recorded date), pred_low/pred50/pred_high,
+    error (pred50 - actual, days), abs_error, covered (actual within pred_low..pred_high)
+    and gap (actual came after more than gap_max days = probably missing records)
+    """
+    days = np.asarray(days, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    quantiles, user = origin_quantiles(days, offsets, n_window, n_recent, gap_max,
+        (q_low, 0.5, q_high))
+    # Origins = all dates except the last of each user (nothing to compare with)
+    has_next = np.ones(len(days), dtype=bool)
+    counts = np.diff(offsets)
+    has_next[offsets[1:][counts > 0] - 1] = False
+    rows = np.flatnonzero(has_next & ~np.isnan(quantiles[:, 1]))
+
+    origin = days[rows]
+    actual = days[rows + 1]
+    pred = pred_days(origin[:, None], quantiles[rows])
+    result = pd.DataFrame({
+        'user': user[rows],
+        'origin': origin.astype("datetime64[D]"),
+        'actual': actual.astype("datetime64[D]"),
+        'pred_low': pred[:, 0].astype("datetime64[D]"),
+        'pred50': pred[:, 1].astype("datetime64[D]"),
+        'pred_high': pred[:, 2].astype("datetime64[D]"),
+        'error': pred[:, 1] - actual,
+        'covered': (pred[:, 0] <= actual) & (actual <= pred[:, 2]),
+        'gap': actual - origin > gap_max,
+    })
+    result['abs_error'] = result['error'].abs()
+    return result
+
+def summarize(result, include_gaps=False, max_cycle=None):
+    """Accuracy of a backtest: number of predictions, mean absolute error, bias, interquartile coverage
+    max_cycle: cycles longer than this are gaps (default: gap_max the backtest was run with);
+    set it when comparing backtests with different gap_max, so they are scored on the same cycles
+    """
+    if not include_gaps:
+        if max_cycle is None:
+            result = result[~result['gap']]
+        else:
+            result = result[(result['actual'] - result['origin']).dt.days <= max_cycle]
+    return pd.Series({
+        'n': len(result),
+        'mae': result['abs_error'].mean(),
+        'bias': result['error'].mean(),
+        'coverage': result['covered'].mean(),
+    })
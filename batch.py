@@ -0,0 +1,138 @@
+from datetime import datetime
+import numpy as np
+from date_parser import parse_dates
+from order_stats import lerp, virtual_index
+
+# Batch prediction for many users at once
+# All users' dates are in one flat array of day numbers (days since 1970-01-01),
+# sorted within each user; user u has days[offsets[u]:offsets[u + 1]].
+# Everything is computed with a few NumPy passes over the flat array,
+# with the same rules as CycleTracker.process_data.
+
+def ragged(histories):
+    """Build (days, offsets) from a list of per-user date lists (strings or day numbers)"""
+    arrays = []
+    for history in histories:
+        history = list(history)
+        if len(history) > 0 and isinstance(history[0], str):
+            history = parse_dates(history).days
+        arrays.append(np.unique(np.asarray(history, dtype=np.int64)))
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(a) for a in arrays])
+    days = np.concatenate(arrays) if arrays else np.array([], dtype=np.int64)
+    return days, offsets
+
+def segment_quantiles(values, starts, counts, q):
+    """Quantile q of each segment values[starts[u]:starts[u] + counts[u]] (segments sorted)
+    Same linear interpolation arithmetic as numpy/pandas; NaN for empty segments
+    """
+    result = np.full(len(counts), np.nan)
+    has = counts > 0
+    n = counts[has].astype(float)
+    virtual = virtual_index(n, q)
+    below = np.clip(np.floor(virtual), 0, n - 1).astype(np.int64)
+    above = np.minimum(below + 1, n - 1).astype(np.int64)
+    a = values[starts[has] + below]
+    b = values[starts[has] + above]
+    quantile = lerp(a, b, virtual - below)
+    quantile = np.where(virtual >= n - 1, values[starts[has] + (n - 1).astype(np.int64)], quantile)
+    quantile = np.where(virtual < 0, a, quantile)
+    result[has] = quantile
+    return result
+
+def quantile_name(q):
+    """Column suffix for quantile q: 0.25 -> "25", 0.5 -> "50" """
+    return str(round(q * 100))
+
+def clean_deltas(days, offsets, n_window=36, gap_max=35):
+    """Clean delta of every date (NaN outside the last n_window dates of the user, for the
+    first date of the window and for gaps > gap_max) + user id of every date
+    n_window=None: whole history"""
+    counts = np.diff(offsets)
+    user = np.repeat(np.arange(len(counts)), counts)
+    pos = np.arange(len(days)) - offsets[:-1][user]
+    delta = np.full(len(days), np.nan)
+    delta[1:] = np.diff(days)
+    # delta needs the previous date in the same window
+    has_previous = pos >= 1
+    if n_window is not None:
+        has_previous &= pos - 1 >= counts[user] - n_window
+    delta[~has_previous] = np.nan
+    delta[delta > gap_max] = np.nan
+    return delta, user
+
+def recent_deltas(days, offsets, n_window=36, n_recent=12, gap_max=35):
+    """Last n_recent clean deltas of every user as sorted segments
+    Returns (values, starts, counts): user u has values[starts[u]:starts[u] + counts[u]]
+    """
+    counts = np.diff(offsets)
+    n_users = len(counts)
+    delta, user = clean_deltas(days, offsets, n_window, gap_max)
+    clean = ~np.isnan(delta)
+
+    # Rank of clean deltas from the end of each user -> keep the last n_recent
+    cum = np.cumsum(clean)
+    user_total = np.zeros(n_users, dtype=np.int64)
+    nonempty = counts > 0
+    user_total[nonempty] = cum[offsets[1:][nonempty] - 1]
+    rank = user_total[user] - cum + clean
+    selected = clean & (rank <= n_recent)
+
+    # Sort selected deltas by user and value -> each user is one sorted segment
+    sel_user = user[selected]
+    sel_delta = delta[selected]
+    order = np.lexsort((sel_delta, sel_user))
+    sel_delta = sel_delta[order]
+    n_used = np.bincount(sel_user, minlength=n_users)
+    starts = np.zeros(n_users, dtype=np.int64)
+    starts[1:] = np.cumsum(n_used)[:-1]
+    return sel_delta, starts, n_used
+
+def last_days(days, offsets):
+    """Last day of every user (NaT as int64 for users without dates)"""
+    counts = np.diff(offsets)
+    last = np.full(len(counts), np.iinfo(np.int64).min)     # NaT
+    nonempty = counts > 0
+    last[nonempty] = days[offsets[1:][nonempty] - 1]
+    return last
+
+def pred_days(last, length):
+    """Predicted day = last day + cycle length (scalars or arrays)"""
+    # date + Timedelta(days=q) -> .date() = date + floor(q) days
+    return last + np.floor(length).astype(np.int64)
+
+def predict_batch(days, offsets, today=None, n_window=36, n_recent=12, gap_max=35,
+        qs=(0.25, 0.5, 0.75)):
+    """Predictions for all users, returns dict of columnar arrays (one row per user)
+
+    n_dates, n_recent: number of dates and of clean deltas used
+    delta_25, delta_50, delta_75: quantiles of the recent clean deltas (NaN if < 3)
+    last, pred25, pred50, pred75: datetime64[D] (NaT if there is no prediction)
+    time_med, time_25, time_75: days from today to pred50/pred25/pred75 (NaN if no prediction)
+    """
+    days = np.asarray(days, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    n_users = len(counts)
+    if today is None:
+        today = datetime.now().date()
+    today = np.datetime64(today, "D").astype(np.int64)
+
+    sel_delta, starts, n_used = recent_deltas(days, offsets, n_window, n_recent, gap_max)
+
+    result = {"n_dates": counts, "n_recent": n_used}
+    enough = n_used >= 3
+    last = last_days(days, offsets)
+    result["last"] = last.astype("datetime64[D]")
+    for q in qs:
+        name = quantile_name(q)
+        quantile = segment_quantiles(sel_delta, starts, n_used, q)
+        quantile[~enough] = np.nan
+        result[f"delta_{name}"] = quantile
+        pred = np.full(n_users, np.iinfo(np.int64).min)
+        pred[enough] = pred_days(last[enough], quantile[enough])
+        result[f"pred{name}"] = pred.astype("datetime64[D]")
+        time = np.full(n_users, np.nan)
+        time[enough] = pred[enough] - today
+        result[f"time_{'med' if name == '50' else name}"] = time
+    return result
@@ -0,0 +1,104 @@
+import os
+import numpy as np
+import pandas as pd
+from file_utils import atomic_write
+from date_parser import parse_dates, parse_file, warn_errors
+
+# Compact binary file with dates
+# The file is just a sorted array of int32 = days since 1970-01-01 (4 bytes per date)
+# It is memory-mapped read-only, so loading costs (almost) nothing
+
+DAY_DTYPE = np.dtype("<i4")
+
+def to_days(values):
+    """Convert date strings (or dates) to int day numbers, raises ValueError for malformed dates"""
+    values = [x.strftime('%Y-%m-%d') if hasattr(x, "strftime") else x for x in values]
+    parsed = parse_dates(values)
+    if len(parsed.errors) > 0:
+        _, text, reason = parsed.errors[0]
+        raise ValueError(f"Malformed date {text!r}: {reason}")
+    return parsed.days.astype(DAY_DTYPE)
+
+def to_iso(days):
+    """Convert day numbers to 'YYYY-MM-DD' strings"""
+    return np.datetime_as_string(np.asarray(days, dtype="datetime64[D]"), unit="D")
+
+
+class BinaryDateStore:
+    def __init__(self, path):
+        self.path = path
+        self._days = None
+
+    def reload(self):
+        """Map the file again (after it was changed by another process)"""
+        self._days = None
+
+    @property
+    def days(self):
+        """Sorted day numbers, memory-mapped read-only"""
+        if self._days is None:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                self._days = np.memmap(self.path, dtype=DAY_DTYPE, mode="r")
+            else:
+                self._days = np.array([], dtype=DAY_DTYPE)
+        return self._days
+
+    def dates(self):
+        """Dates as datetime64[D] array"""
+        return self.days.astype("datetime64[D]")
+
+    def deltas(self):
+        """Days between consecutive dates, computed directly over the mapped buffer"""
+        return np.diff(self.days)
+
+    def __len__(self):
+        return len(self.days)
+
+    def __contains__(self, day):
+        i = np.searchsorted(self.days, day)
+        return i < len(self.days) and self.days[i] == day
+
+    def write(self, days):
+        """Replace the file with sorted unique day numbers"""
+        days = np.unique(np.asarray(days, dtype=DAY_DTYPE))
+        self._days = None   # release the old map before replacing the file
+        atomic_write(self.path, days.tobytes())
+
+    def extend(self, days):
+        """Append sorted unique days, all later than the last stored one"""
+        with open(self.path, "ab") as f:
+            f.write(np.asarray(days, dtype=DAY_DTYPE).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._days = None
+
+    def add(self, day):
+        """Add one day, returns True if it was not there yet"""
+        if day in self:
+            return False
+        if len(self.days) == 0 or day > self.days[-1]:
+            # Most common case (new date is the latest one): just append 4 bytes
+            self.extend([day])
+        else:
+            self.write(np.append(self.days, day))
+        return True
+
+    def delete(self, day):
+        """Delete one day, returns True if it was there"""
+        if day not in self:
+            return False
+        self.write(self.days[self.days != day])
+        return True
+
+    @classmethod
+    def from_csv(cls, csv_file, path):
+        """Create binary store from CSV file with one date per line"""
+        parsed = parse_file(csv_file)
+        warn_errors(parsed.errors, csv_file)
+        store = cls(path)
+        store.write(parsed.days)
+        return store
+
+    def to_csv(self, csv_file):
+        """Export dates to CSV file in 'YYYY-MM-DD' format (same layout as dates.csv)"""
+        pd.DataFrame({'date': to_iso(self.days)}).to_csv(csv_file, index=False, header=False)
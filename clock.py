@@ -0,0 +1,75 @@
+import threading
+import weakref
+from datetime import datetime, timedelta
+
+# "Today" for the trackers
+# Statistics from the dates are cached until the dates change; only the days
+# remaining until the predicted dates (time_med, time_2575) depend on the clock.
+# DayScheduler refreshes just those for every live tracker after midnight,
+# so a long-running app doesn't show yesterday's numbers.
+
+def system_today():
+    """Default clock: local date"""
+    return datetime.now().date()
+
+# Trackers register themselves when created and disappear when garbage collected
+live_trackers = weakref.WeakSet()
+
+def register(tracker):
+    live_trackers.add(tracker)
+
+def refresh_all(trackers=None):
+    """Recompute the clock-dependent fields of trackers (default: all live ones), returns the refreshed ones"""
+    refreshed = []
+    for tracker in list(live_trackers if trackers is None else trackers):
+        if tracker.refresh_today():
+            refreshed.append(tracker)
+    return refreshed
+
+def seconds_to_midnight(now=None):
+    """Seconds until the next local midnight"""
+    if now is None:
+        now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds()
+
+
+class DayScheduler:
+    """Thread that calls refresh_all() at every day boundary
+    trackers: trackers to refresh (default: all live trackers)
+    on_rollover(trackers): called with the refreshed trackers (e.g. to redraw the UI)
+    lock: optional lock held while the trackers are refreshed (shared with the UI code)
+    margin: seconds to wait after midnight, so the clock surely shows the new day
+    """
+    def __init__(self, trackers=None, on_rollover=None, lock=None, margin=1.0):
+        self.trackers = trackers
+        self.on_rollover = on_rollover
+        self.lock = lock if lock is not None else threading.Lock()
+        self.margin = margin
+        self._stop = threading.Event()
+        self._thread = None
+
+    def tick(self):
+        """Refresh now, returns the refreshed trackers"""
+        with self.lock:
+            refreshed = refresh_all(self.trackers)
+        if refreshed and self.on_rollover is not None:
+            self.on_rollover(refreshed)
+        return refreshed
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        # Sleeping until midnight is recomputed every round (clock changes, suspend)
+        while not self._stop.wait(seconds_to_midnight() + self.margin):
+            self.tick()
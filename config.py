@@ -1,7 +1,7 @@
 # Colors
 c_main = "#870765"
 c_ring = "#D9A80B"
-c_outline = "876907"
+c_outline = "#876907"
 
 # Line style
 lw = 0.5
\ No newline at end of file
@@ -1,187 +1,475 @@
 import os
-from datetime import datetime
-from datetime import date
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-import seaborn as sns
-import io
-import base64
-from config import c_main, c_ring, c_outline, lw
+from journal import ADD, DELETE
+from storage import CsvStorage
+from date_parser import parse_dates, read_dates_file, warn_errors
+from date_index import DateIndex
+from incremental import RollingStats
+from order_stats import rolling_quantile
+import numpy_core
+from clock import system_today, register
+from forecast import forecast
+from probability import ProbabilityTable, delta_pmf
+from render_cache import shared_cache
+import plots
+import svg_render
+import figure_pool
+
+# Plot renderers: function of the render inputs returning a base64 image
+RENDERERS = {'matplotlib': plots.render, 'svg': svg_render.render, 'figure_pool': figure_pool.render}
+
+class _Stat:
+    """Attribute computed by process_data, lazily on first access after the data changed"""
+    def __set_name__(self, owner, name):
+        self.name = "_" + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj._stats_version != obj.version:
+            obj.process_data()
+        return obj.__dict__.get(self.name)
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+class _Frame(_Stat):
+    """DataFrame statistic; after an incremental update it is built from the rolling window on first access"""
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = super().__get__(obj, objtype)
+        if obj._frames_pending:
+            obj.build_frames()
+            value = obj.__dict__.get(self.name)
+        return value
+
+
+class _Today(_Stat):
+    """Statistic that depends on today's date, recomputed from the cached predicted dates when the day changes"""
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = super().__get__(obj, objtype)
+        if obj._times_day != obj.clock():
+            obj.set_times()
+            value = obj.__dict__.get(self.name)
+        return value
+
 
 class CycleTracker:
-    def __init__(self, csv_file='dates.csv'):
+    # Statistics are only computed when somebody reads them
+    df = _Frame()
+    recent = _Frame()
+    invalid_dates = _Stat()
+    pred50 = _Stat()
+    pred25 = _Stat()
+    pred75 = _Stat()
+    pred_date = _Stat()
+    time_med = _Today()
+    time_2575 = _Today()
+    delta_med = _Stat()
+    delta_25 = _Stat()
+    delta_75 = _Stat()
+
+    def __init__(self, csv_file='dates.csv', storage=None,
+            n_window=36, n_recent=12, gap_max=35, q_low=0.25, q_high=0.75, backend="pandas",
+            clock=None, render_cache=None, renderer="matplotlib"):
+        """storage: backend from storage.py, default is CSV file csv_file
+        backend: "pandas" (original computation) or "numpy" (numpy_core.py, same results, much faster;
+        df/recent are then only built when they are read)
+        clock: function returning today's date (default: local date), used for time_med and time_2575
+        render_cache: RenderCache for the plots (default: one cache shared by all trackers)
+        renderer: "matplotlib" (PNG), "svg" (svg_render.py, much faster and smaller)
+        or "figure_pool" (PNG from reused per-thread figures, figure_pool.py)
+        Prediction parameters (defaults were picked by hand, see sweep.py for tuning):
+        n_window: number of latest dates used at all
+        n_recent: number of recent cycle lengths used for prediction
+        gap_max: longer cycles are treated as a gap in the series (missing records etc.)
+        q_low, q_high: quantiles for the prediction range (delta_25/pred25 and delta_75/pred75)
+        """
         self.csv_file = csv_file
-        self.dates = None
-        self.df = None
+        self.n_window = n_window
+        self.n_recent = n_recent
+        self.gap_max = gap_max
+        self.q_low = q_low
+        self.q_high = q_high
+        if backend not in ("pandas", "numpy"):
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = backend
+        self.clock = clock if clock is not None else system_today
+        self._times_day = None        # day time_med/time_2575 were computed for
+        self.render_cache = render_cache if render_cache is not None else shared_cache
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer: {renderer}")
+        self.renderer = renderer
+        self._tables = {}             # probability tables of the current version
+        self._tables_version = None
+        self.storage = storage if storage is not None else CsvStorage(csv_file)
+        self.index = DateIndex()
+        self._dates = None
+        self.generation = None
+        self.version = 0              # increased with every change of dates
+        self._stats_version = None    # version the statistics were computed for
+        self._frames_pending = False
+        self.engine = RollingStats(n_window, n_recent, gap_max)  # rolling windows for O(1) update when a date is appended
+        self._engine_synced = True    # False = engine has to be rebuilt from the index before use
+        self._warn_invalid = False
         self.load_data()
+        register(self)    # refreshed by clock.DayScheduler at midnight
     
     def load_data(self):
-        """Load data from file"""
-        if os.path.exists(self.csv_file):
-            self.dates = pd.read_csv(self.csv_file, header=None, names=['date'])
-            self.dates = self.dates.sort_values("date").reset_index(drop=True)
-        else:
-            self.dates = pd.DataFrame(columns=['date'])
-        self.process_data()
+        """Load data from storage"""
+        with self.storage.locked():
+            self.generation = self.storage.generation()
+            self.index = self.load_index()
+        self._warn_invalid = True
+        self.data_changed()
+
+    def load_index(self):
+        """Index of all stored dates (from day numbers if the storage has them, else parsed strings)"""
+        if hasattr(self.storage, "load_days"):
+            return DateIndex.from_days(self.storage.load_days())
+        return DateIndex.from_values(self.storage.load()['date'])
+
+    def data_changed(self):
+        """Mark statistics as outdated, they are recomputed on next access"""
+        self.version += 1
+        self._dates = None
+
+    @property
+    def dates(self):
+        """All valid dates (strings as stored) in chronological order, built from the index when needed"""
+        if self._dates is None:
+            self._dates = self.index.to_frame()
+        return self._dates
+
+    def update_stats(self):
+        """Compute statistics now, if they are outdated"""
+        if self._stats_version != self.version:
+            self.process_data()
+
+    def reload_if_changed(self):
+        """Catch up with changes made by someone else since our last load/save
+        If the files only grew, just the appended tail is read
+        Returns True if the dates changed
+        """
+        with self.storage.locked():
+            generation = self.storage.generation()
+            if generation == self.generation:
+                return False
+            records = self.storage.read_changes()
+            if records is None:
+                index = self.load_index()
+                changed = not index.same_as(self.index)
+                self.index = index
+                self._warn_invalid = changed
+            else:
+                changed = self.index.apply(records)
+            self.generation = generation
+        if changed:
+            self.data_changed()
+        return changed
+
+    def save_change(self, op, date_str):
+        """Save single change (CSV: journal record, SQLite: one-row transaction)"""
+        self.save_changes([(op, date_str)])
+
+    def save_changes(self, records):
+        """Save several changes in one write"""
+        self.storage.save(records)
+        self.generation = self.storage.generation()
     
     def process_data(self):
         """Process data: limit to last 3 years + calculate deltas"""
-        self.df = self.dates.copy()
-        self.df['date'] = pd.to_datetime(self.df['date'], errors="coerce")
-        self.df = self.df.dropna(subset=['date'])
-        # Initialize prediction variables (they will remain empty if there is no data file yet)
-        self.pred50 = None
-        self.pred25 = None
-        self.pred75 = None
-        self.pred_date = "Not enough data"
-        self.time_med = None
-        self.time_2575 = []
-        self.delta_med = None
-        self.delta_25 = None
-        self.delta_75 = None
+        # Dates come already parsed and sorted from the index
+        # Malformed dates are kept in invalid_dates instead of silently becoming NaT
+        self._stats_version = self.version
+        self._frames_pending = False
+        self._engine_synced = False     # rebuilt only when an incremental update needs it
+        self.invalid_dates = self.index.errors
+        if self._warn_invalid:     # warn once after loading, not on every recompute
+            warn_errors(self.invalid_dates, self.storage.source)
+            self._warn_invalid = False
+        if self.backend == "numpy":
+            self.process_numpy()
+            return
+        self.df = pd.DataFrame(
+            {'date': self.index.day_array().astype("datetime64[D]").astype("datetime64[ns]")})
+        self.reset_predictions()
 
         # Stop if we have no data
         if len(self.df) == 0:
             return
 
-        # Limit data to last 36 non-missing obs
-        self.df = self.df.tail(36)
+        # Limit data to last 36 (n_window) non-missing obs
+        self.df = self.df.tail(self.n_window)
         self.df["delta"] = self.df['date'].diff().dt.days
         self.df["delta_clean"] = np.select(
-            [(self.df["delta"] > 35)],
+            [(self.df["delta"] > self.gap_max)],
             [np.nan],
             default = self.df["delta"])
 
-        # Recent data for prediction: 12 non-missing deltas
-        self.recent = self.df.dropna(subset=['delta_clean']).tail(12)
+        # Recent data for prediction: 12 (n_recent) non-missing deltas
+        self.recent = self.df.dropna(subset=['delta_clean']).tail(self.n_recent)
 
         # Stop when there is not enough data for prediction 
         if len(self.recent) < 3:
             return
 
-        # Predicted dates = last date + median/quartiles delta
+        self.set_predictions(
+            self.df['date'].iloc[-1],
+            self.recent["delta_clean"].quantile(self.q_low),
+            self.recent["delta_clean"].quantile(0.5),
+            self.recent["delta_clean"].quantile(self.q_high))
+
+    def process_numpy(self):
+        """Same as the pandas part of process_data, on plain day numbers (see numpy_core.py)"""
+        self.reset_predictions()
+        self.df = None
+        self.recent = None
+        self._frames_pending = True
+        last_day, quantiles = numpy_core.compute(self.index.days, self.n_window, self.n_recent,
+            self.gap_max, (self.q_low, 0.5, self.q_high))
+        if quantiles is not None:
+            self.set_predictions_day(last_day, *quantiles)
+
+    def reset_predictions(self):
+        """Initialize prediction variables (they remain empty if there is not enough data)"""
+        self.pred50 = None
+        self.pred25 = None
+        self.pred75 = None
+        self.pred_date = "Not enough data"
+        self.time_med = None
+        self.time_2575 = []
+        self.delta_med = None
+        self.delta_25 = None
+        self.delta_75 = None
+
+    def set_predictions(self, last_date, q25, q50, q75):
+        """Predicted dates = last date + median/quartiles delta"""
         # Exact timedelta is used to get the dates
-        self.delta_med = pd.Timedelta(days = self.recent["delta_clean"].quantile(0.5))
-        self.delta_25 = pd.Timedelta(days = self.recent["delta_clean"].quantile(0.25))
-        self.delta_75 = pd.Timedelta(days = self.recent["delta_clean"].quantile(0.75))
+        self.delta_med = pd.Timedelta(days = q50)
+        self.delta_25 = pd.Timedelta(days = q25)
+        self.delta_75 = pd.Timedelta(days = q75)
         
-        self.pred50 = (pd.to_datetime(self.dates['date'].iloc[-1]) + self.delta_med).date()
+        self.pred50 = (last_date + self.delta_med).date()
         self.pred_date = str(self.pred50)
-        self.pred25 = (pd.to_datetime(self.dates['date'].iloc[-1]) + self.delta_25).date()
-        self.pred75 = (pd.to_datetime(self.dates['date'].iloc[-1]) + self.delta_75).date()
+        self.pred25 = (last_date + self.delta_25).date()
+        self.pred75 = (last_date + self.delta_75).date()
+        self.set_times()
+
+    def set_predictions_day(self, last_day, q25, q50, q75):
+        """set_predictions for last date as day number, without Timestamp arithmetic"""
+        self.delta_med = pd.Timedelta(days = q50)
+        self.delta_25 = pd.Timedelta(days = q25)
+        self.delta_75 = pd.Timedelta(days = q75)
 
+        # Timestamp at midnight + Timedelta -> .date() = date + whole days of the Timedelta
+        self.pred50 = numpy_core.day_to_date(last_day + self.delta_med.days)
+        self.pred_date = str(self.pred50)
+        self.pred25 = numpy_core.day_to_date(last_day + self.delta_25.days)
+        self.pred75 = numpy_core.day_to_date(last_day + self.delta_75.days)
+        self.set_times()
+
+    def set_times(self):
+        """Days remaining until the predicted dates (the only statistics that depend on today)"""
+        today = self.clock()
+        self._times_day = today
+        if self.pred50 is None:
+            return
         # Predicted time = remaining time
-        self.time_med = (self.pred50 - datetime.now().date()).days
+        self.time_med = (self.pred50 - today).days
         self.time_2575 = list(set([       # The set step is to remove duplicities 
-            (self.pred25 - datetime.now().date()).days,
-            (self.pred75 - datetime.now().date()).days
+            (self.pred25 - today).days,
+            (self.pred75 - today).days
         ]))
+
+    def refresh_today(self):
+        """Update time_med/time_2575 if the day changed (no reload, no recompute of the statistics)
+        Returns True if they were updated
+        """
+        if self._stats_version != self.version or self._times_day == self.clock():
+            return False
+        self.set_times()
+        return True
     
+    def rolling_quantiles(self, window=10, qs=(0.25, 0.5, 0.75), min_periods=2):
+        """Rolling quantiles of cycle length over the whole history
+        (the rolling median of old/predictor.py is q 0.5; shift(1) gives the prediction made at each date)
+        Returns DataFrame with date, delta_clean and one column per quantile (q25, q50, ...)
+        """
+        days = self.index.day_array()
+        delta = np.full(len(days), np.nan)
+        delta[1:] = np.diff(days)
+        delta_clean = np.where(delta > self.gap_max, np.nan, delta)
+        result = pd.DataFrame({
+            'date': days.astype("datetime64[D]").astype("datetime64[ns]"),
+            'delta_clean': delta_clean})
+        for q in qs:
+            result[f"q{round(q * 100)}"] = rolling_quantile(delta_clean, window, q, min_periods)
+        return result
+
+    def forecast(self, n_cycles=12, n_samples=1000, seed=None):
+        """Next n_cycles dates with bands from resampled recent cycle lengths (see forecast.py)
+        Returns DataFrame with cycle and pred<q_low>/pred50/pred<q_high> columns (empty if there is no prediction)
+        """
+        if self.pred50 is None:
+            return forecast(0, [], 0, n_samples, (self.q_low, 0.5, self.q_high))
+        return forecast(self.index.last(), np.sort(self.recent["delta_clean"].to_numpy()),
+            n_cycles, n_samples, (self.q_low, 0.5, self.q_high), seed)
+
+    def probability_table(self, horizon=60, bandwidth=0.0):
+        """Probability of the next date per day (see probability.py), cached until the dates change
+        bandwidth: smoothing in days (0 = raw empirical distribution)
+        Returns ProbabilityTable, None if there is no prediction
+        """
+        if self.pred50 is None:
+            return None
+        if self._tables_version != self.version:
+            self._tables = {}
+            self._tables_version = self.version
+        key = (horizon, bandwidth)
+        if key not in self._tables:
+            deltas = self.recent["delta_clean"].to_numpy()
+            pmf = delta_pmf(deltas, [len(deltas)], horizon, bandwidth)[0]
+            self._tables[key] = ProbabilityTable(self.index.last(), pmf)
+        return self._tables[key]
+
     def add_date(self, date_str):
         """Add date, returns True if successful"""
-        if date_str in self.dates['date'].values:
-            return False
-        
-        self.dates.loc[len(self.dates)] = date_str
-        self.dates = self.dates.sort_values("date").reset_index(drop=True)
-        self.dates.to_csv(self.csv_file, index=False, header=False)
-        self.process_data()
+        # The lock is held from the check to the save, so other processes can't interfere
+        with self.storage.locked():
+            self.reload_if_changed()
+            up_to_date = self._stats_version == self.version
+            last = self.index.last()
+            if not self.index.add(date_str):
+                return False
+            self.save_change(ADD, date_str)
+        self.data_changed()
+        if up_to_date and last is not None and self.index.last() > last:
+            self.append_update()
         return True
+
+    def append_update(self):
+        """Update statistics in O(1) after the latest date was appended (instead of process_data)"""
+        self._stats_version = self.version
+        self.sync_engine(appended=True)
+        self.reset_predictions()
+        self.df = None
+        self.recent = None
+        self._frames_pending = True
+        quantiles = self.engine.quantiles((self.q_low, 0.5, self.q_high))
+        if quantiles is None:
+            return
+        if self.backend == "numpy":
+            self.set_predictions_day(self.engine.last_day(), *quantiles)
+        else:
+            last_date = pd.Timestamp(np.datetime64(self.engine.last_day(), "D"))
+            self.set_predictions(last_date, *quantiles)
+
+    def sync_engine(self, appended=False):
+        """Bring the rolling window up to date with the index
+        appended: the latest date of the index was just added (O(1) if the engine was in sync before)
+        """
+        if self._engine_synced and appended:
+            self.engine.append(self.index.last())
+        elif not self._engine_synced:
+            self.engine.reset(self.index.days)
+        self._engine_synced = True
+
+    def build_frames(self):
+        """Build df and recent from the rolling window"""
+        self._frames_pending = False
+        self.sync_engine()
+        self.df, self.recent = self.engine.frames()
     
+    def add_dates(self, dates):
+        """Add many dates at once (list of dates or path to a file with one date per line)
+        Dates are checked and sorted together, saved with one write and processed once
+        Returns DataFrame with status of each input row: added / duplicate / invalid
+        """
+        if isinstance(dates, (str, os.PathLike)):
+            dates = read_dates_file(dates)
+        values = [x.strftime('%Y-%m-%d') if hasattr(x, "strftime") else str(x).strip()
+            for x in dates]
+
+        report = pd.DataFrame({'date': values})
+        parsed = parse_dates(values)
+        days = np.full(len(values), -1, dtype=np.int64)
+        days[parsed.rows] = parsed.days
+        invalid = np.ones(len(values), dtype=bool)
+        invalid[parsed.rows] = False
+
+        with self.storage.locked():
+            self.reload_if_changed()
+            duplicate = ~invalid & (np.isin(days, self.index.day_array())
+                | pd.Series(days).duplicated().values)
+            report['status'] = np.select([invalid, duplicate], ["invalid", "duplicate"], default="added")
+
+            added = (report['status'] == "added").values
+            new = report.loc[added, 'date']
+            if len(new) > 0:
+                self.index.add_many(days[added].tolist(), new.tolist())
+                self.save_changes([(ADD, date_str) for date_str in new])
+        if len(new) > 0:
+            self.data_changed()
+        return report
+
     def delete_date(self, date_str):
         """Delete date, returns True if successful"""
-        if date_str not in self.dates['date'].values:
-            return False
-        
-        self.dates = self.dates[self.dates['date'] != date_str]
-        self.dates = self.dates.sort_values("date").reset_index(drop=True)
-        self.dates.to_csv(self.csv_file, index=False, header=False)
-        self.process_data()
+        with self.storage.locked():
+            self.reload_if_changed()
+            stored = self.index.remove(date_str)
+            if stored is None:
+                return False
+            self.save_change(DELETE, stored)
+        self.data_changed()
         return True
     
+    def render_inputs(self, kind):
+        """Everything the plot depends on (see plots.py), None if there is nothing to plot
+        kind: "raw" or "pred"
+        """
+        if kind == "raw":
+            if len(self.df) == 0:
+                return None
+            return {
+                'kind': kind,
+                'renderer': self.renderer,
+                'date': self.df["date"].to_numpy().astype("datetime64[D]"),
+                'delta_clean': self.df["delta_clean"].to_numpy(dtype=float),
+                'style': plots.STYLE,
+                'size': (8, 4),
+            }
+        if kind == "pred":
+            if len(self.df) <3 or self.time_med is None:
+                return None
+            return {
+                'kind': kind,
+                'renderer': self.renderer,
+                'delta_med': self.delta_med.days,
+                'time_med': self.time_med,
+                'time_2575': sorted(self.time_2575),
+                'style': plots.STYLE,
+                'size': (8, 8),
+            }
+        raise ValueError(f"Unknown plot: {kind}")
+
     def plot_raw(self):
         """Create plot of raw data as base64 string"""
-        if len(self.df) == 0:
+        inputs = self.render_inputs("raw")
+        if inputs is None:
             return None
-        
-        sns.set_style("white")
-        sns.set_context("paper")
-        
-        fig_raw, ax = plt.subplots(figsize=(8, 4))
-        ax.scatter(self.df["date"], self.df["delta_clean"], color = c_main)
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Cycle Length (days)")
-        ax.set_ylim(15, 35)
-        ax.set_title("Your data")
-
-        # This makes the line to interrupt when data are missing
-        for _, group in self.df.groupby((self.df["delta_clean"].isna()).cumsum()):
-            segment = group.dropna(subset=["delta_clean"])
-            if not segment.empty:
-                sns.lineplot(data = segment, 
-                    x = "date", y = "delta_clean", 
-                    linestyle = ':', color = c_ring, legend = False)
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')
-        buf.seek(0)
-        plt.close(fig_raw)
-        
-        return base64.b64encode(buf.read()).decode()
-    
+        return self.render_cache.render(inputs, RENDERERS[self.renderer])
+
     def plot_pred(self):
         """Create prediction plot as base64 string"""
-        if len(self.df) <3:
+        inputs = self.render_inputs("pred")
+        if inputs is None:
             return None
-
-        # Prediction text for plot ---
         self.time_abs = [abs(x) for x in self.time_2575]
-
-        if self.time_2575 == [1]: 
-            range = "1 day"
-        elif len(self.time_2575) == 1: 
-            range =  f"{self.time_2575} days"
-        else:
-            range = f"{min(self.time_abs)} - {max(self.time_abs)} days"
-
-        if max(self.time_2575) < 0:
-            pred_text = f"Period was due {range} ago"
-        elif min(self.time_2575) <= 0 <= max(self.time_2575): 
-            pred_text = f"Period is due"
-        else:
-            pred_text = f"Next period\nin {range}"
-
-        # Prediction plot ---
-        self.donut = [
-            self.delta_med.days - max(self.time_med, 0),
-            max(self.time_med, 0)
-        ]
-        inner_circle = plt.Circle( (0,0), 0.7, color = 'white', ec = c_outline, linewidth = lw) # to change pie into donut 
-
-        sns.set_style("white")
-        sns.set_context("talk")
-        #sns.set_context("paper")
-        fig_pred, ax = plt.subplots(figsize = (8, 8))
-
-        ax.pie(self.donut, colors = [c_ring, "white"], 
-            startangle=90, counterclock=False,
-            wedgeprops = {"edgecolor":c_outline,'linewidth': lw, 'linestyle': 'solid', 'antialiased': True})
-        p_pred = plt.gcf() # get current figure
-        p_pred.gca().add_artist(inner_circle) # get current axes + adds circle
-
-        plt.text(0, 0,                   # coordinates (center)
-            pred_text,    
-            horizontalalignment = 'center',
-            verticalalignment = 'center',
-            fontsize = 20,
-            fontweight ='bold')
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')
-        buf.seek(0)
-        plt.close(fig_pred)
-        
-        return base64.b64encode(buf.read()).decode()
-
+        self.donut = plots.donut(inputs['delta_med'], inputs['time_med'])
+        return self.render_cache.render(inputs, RENDERERS[self.renderer])
@@ -0,0 +1,127 @@
+from bisect import bisect_left, insort
+import numpy as np
+import pandas as pd
+from date_parser import parse_date, parse_dates
+from journal import ADD, DELETE
+
+class DateIndex:
+    """Sorted index of dates = source of truth for CycleTracker
+
+    Dates are kept as a sorted list of day numbers (days since 1970-01-01),
+    so membership, insert and delete are binary searches. The original
+    strings (as stored in the file) are kept for display and for the journal.
+    Values that are not valid dates are kept aside in errors.
+    """
+    def __init__(self):
+        self.days = []
+        self._values = {}   # day number -> original string (None = not built yet, see from_days)
+        self.errors = []    # (position, text, reason) of malformed values
+
+    @property
+    def values(self):
+        """day number -> original string"""
+        if self._values is None:
+            iso = np.array(self.days, dtype="datetime64[D]").astype(str).tolist()
+            self._values = dict(zip(self.days, iso))
+        return self._values
+
+    @classmethod
+    def from_values(cls, values):
+        """Build index from date strings (one parse + one sort)"""
+        index = cls()
+        values = list(values)
+        parsed = parse_dates(values)
+        index.errors = parsed.errors
+        for day, row in zip(parsed.days.tolist(), parsed.rows.tolist()):
+            index.values.setdefault(day, values[row])   # first one wins for duplicate days
+        index.days = sorted(index.values)
+        return index
+
+    @classmethod
+    def from_days(cls, days):
+        """Build index from sorted unique day numbers (e.g. the memory-mapped binary store)
+        Nothing is parsed; the strings ('YYYY-MM-DD') are only made if somebody needs them
+        """
+        index = cls()
+        index.days = np.asarray(days).tolist()
+        index._values = None
+        return index
+
+    def same_as(self, other):
+        """True if both indexes hold the same dates, strings and errors"""
+        if self.days != other.days or self.errors != other.errors:
+            return False
+        if self._values is None and other._values is None:     # both plain ISO strings
+            return True
+        return self.values == other.values
+
+    @staticmethod
+    def parse(value):
+        """Day number of one date string (None if it's not a valid date)"""
+        return parse_date(value)
+
+    def __len__(self):
+        return len(self.days)
+
+    def __contains__(self, value):
+        day = self.parse(value)
+        return day is not None and self.contains_day(day)
+
+    def contains_day(self, day):
+        i = bisect_left(self.days, day)
+        return i < len(self.days) and self.days[i] == day
+
+    def add(self, value):
+        """Add date string, returns False if it's invalid or already there"""
+        day = self.parse(value)
+        if day is None or self.contains_day(day):
+            return False
+        insort(self.days, day)
+        self.values[day] = value
+        return True
+
+    def add_many(self, days, values):
+        """Add new (not yet present) days with their strings, merged in one sort"""
+        self.values.update(zip(days, values))
+        self.days = sorted(self.values)
+
+    def remove(self, value):
+        """Remove date, returns the stored string (None if it was not there)"""
+        day = self.parse(value)
+        if day is not None and self.contains_day(day):
+            self.days.pop(bisect_left(self.days, day))
+            return self.values.pop(day)
+        # Malformed value stored in the file can be deleted too
+        for i, (_, text, _) in enumerate(self.errors):
+            if text == value:
+                self.errors.pop(i)
+                return text
+        return None
+
+    def apply(self, records):
+        """Apply (op, date) records, returns True if anything changed"""
+        changed = False
+        for op, value in records:
+            if op == ADD:
+                if self.add(value):
+                    changed = True
+                elif self.parse(value) is None:
+                    self.errors.append((None, value, "malformed date"))
+                    changed = True
+            elif op == DELETE:
+                changed = self.remove(value) is not None or changed
+        return changed
+
+    def last(self):
+        """Latest day number (None if empty)"""
+        return self.days[-1] if self.days else None
+
+    def day_array(self):
+        """Days as int32 numpy array"""
+        return np.array(self.days, dtype=np.int32)
+
+    def to_frame(self):
+        """Dates as DataFrame with one 'date' column of original strings, oldest first"""
+        if len(self.days) == 0:
+            return pd.DataFrame(columns=['date'])
+        return pd.DataFrame({'date': [self.values[day] for day in self.days]})
@@ -0,0 +1,147 @@
+import re
+import warnings
+from datetime import date
+from typing import NamedTuple
+import numpy as np
+
+# Date parser for tracker data
+# The format is detected once (from the first date), then all rows are converted
+# straight to day numbers (days since 1970-01-01). Rows that can't be parsed are
+# reported instead of being silently turned into NaT.
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+class DateFormat(NamedTuple):
+    name: str
+    pattern: re.Pattern
+    order: tuple        # positions of (year, month, day) in the regex groups
+    iso_index: list     # for 'dd.mm.YYYY'-like fixed width strings: characters to take to get 'YYYY-mm-dd'
+    separators: dict    # position -> separator character in the fixed width string
+
+FORMATS = [
+    DateFormat("%Y-%m-%d", re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})"), (0, 1, 2),
+        list(range(10)), {4: "-", 7: "-"}),
+    DateFormat("%d.%m.%Y", re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})"), (2, 1, 0),
+        [6, 7, 8, 9, 5, 3, 4, 2, 0, 1], {2: ".", 5: "."}),
+    DateFormat("%d/%m/%Y", re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})"), (2, 1, 0),
+        [6, 7, 8, 9, 5, 3, 4, 2, 0, 1], {2: "/", 5: "/"}),
+    DateFormat("%Y/%m/%d", re.compile(r"(\d{4})/(\d{1,2})/(\d{1,2})"), (0, 1, 2),
+        list(range(10)), {4: "/", 7: "/"}),
+]
+
+class ParseResult(NamedTuple):
+    days: np.ndarray    # int32 days since 1970-01-01 of valid rows
+    rows: np.ndarray    # positions of valid rows in the input
+    errors: list        # (position, text, reason) of malformed rows
+    fmt: str            # detected format (None if nothing could be parsed)
+
+    def dates(self):
+        """Valid dates as datetime64[D] array"""
+        return self.days.astype("datetime64[D]")
+
+
+def detect_format(values):
+    """Return format of the first value that matches one of FORMATS"""
+    for value in values:
+        value = str(value).strip()
+        for fmt in FORMATS:
+            if fmt.pattern.fullmatch(value):
+                return fmt
+    return None
+
+def _parse_fixed_width(values, fmt):
+    """Vectorized path: all values are 10 characters in the detected format
+    Characters are reordered to 'YYYY-mm-dd' and converted by numpy in one go
+    Returns None if the fast path can't be used
+    """
+    try:
+        # One byte more than needed: longer values are cut to 11, not to a valid-looking 10
+        chars = np.array(values, dtype="S11")
+    except UnicodeEncodeError:
+        return None
+    if len(chars) == 0 or (np.char.str_len(chars) != 10).any():
+        return None
+    chars = chars.astype("S10").view("S1").reshape(-1, 10)
+    for pos, sep in fmt.separators.items():
+        if (chars[:, pos] != sep.encode()).any():
+            return None
+    # numpy also takes signs ("+024-01-01"), the per-row parser does not
+    digits = np.delete(chars, list(fmt.separators), axis=1)
+    if ((digits < b"0") | (digits > b"9")).any():
+        return None
+    iso = np.ascontiguousarray(chars[:, fmt.iso_index])
+    iso[:, 4] = b"-"
+    iso[:, 7] = b"-"
+    try:
+        return iso.view("S10").ravel().astype("datetime64[D]").astype(np.int32)
+    except ValueError:      # some date is not valid (e.g. 31.02.)
+        return None
+
+def _parse_one(value, fmt):
+    """Parse one value, returns (day number, None) or (None, reason)"""
+    match = fmt.pattern.fullmatch(value)
+    if match is None:
+        # Row in other format than the rest of the file
+        for other in FORMATS:
+            match = other.pattern.fullmatch(value)
+            if match is not None:
+                fmt = other
+                break
+        else:
+            return None, "unknown format"
+    parts = match.groups()
+    year, month, day = (int(parts[i]) for i in fmt.order)
+    try:
+        return date(year, month, day).toordinal() - EPOCH_ORDINAL, None
+    except ValueError as e:
+        return None, str(e)
+
+def parse_date(value):
+    """Parse one date string, returns day number (None if it's malformed)"""
+    day, _ = _parse_one(str(value).strip(), FORMATS[0])
+    return day
+
+def parse_dates(values, fmt=None):
+    """Parse sequence of date strings, returns ParseResult"""
+    values = [str(x).strip() for x in values]
+    if fmt is None:
+        fmt = detect_format(values)
+    elif isinstance(fmt, str):
+        fmt = next(f for f in FORMATS if f.name == fmt)
+    if fmt is None:
+        errors = [(i, value, "unknown format") for i, value in enumerate(values)]
+        return ParseResult(np.array([], dtype=np.int32), np.array([], dtype=np.intp), errors, None)
+
+    days = _parse_fixed_width(values, fmt)
+    if days is not None:
+        return ParseResult(days, np.arange(len(values)), [], fmt.name)
+
+    # Row by row (slower, but keeps every valid row and reports the rest)
+    days, rows, errors = [], [], []
+    for i, value in enumerate(values):
+        day, reason = _parse_one(value, fmt)
+        if reason is None:
+            days.append(day)
+            rows.append(i)
+        else:
+            errors.append((i, value, reason))
+    return ParseResult(np.array(days, dtype=np.int32), np.array(rows, dtype=np.intp), errors, fmt.name)
+
+def read_dates_file(path):
+    """Read one date per line (optional 'date' header, blank lines skipped)"""
+    with open(path) as f:
+        values = [line.strip() for line in f]
+    values = [x for x in values if x]
+    if len(values) > 0 and values[0].lower() == "date":
+        values = values[1:]
+    return values
+
+def parse_file(path):
+    """Read and parse file with one date per line"""
+    return parse_dates(read_dates_file(path))
+
+def warn_errors(errors, source):
+    """Warn about malformed rows, so they are not lost silently"""
+    if len(errors) > 0:
+        shown = ", ".join(repr(text) for _, text, _ in errors[:5])
+        warnings.warn(f"{len(errors)} malformed date(s) in {source} were skipped: {shown}")
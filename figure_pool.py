@@ -0,0 +1,125 @@
+import io
+import base64
+import threading
+import numpy as np
+import matplotlib.dates as mdates
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+from plots import donut, pred_text
+
+# Figure pool renderer (CycleTracker(renderer="figure_pool"))
+# Every thread keeps its own pre-built figures (no pyplot, no global seaborn style:
+# the seaborn "white" style and context values are set on the artists directly).
+# A render only updates the artist data - scatter offsets, line data, wedge angles,
+# center text - and encodes the figure again, so threads can render at the same time.
+
+def _style(context):
+    """seaborn style/context values as a dict, without touching matplotlib rcParams"""
+    return {**sns.axes_style("white"), **sns.plotting_context(context)}
+
+def _png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+class RawFigure:
+    """Scatter + dotted line of cycle lengths"""
+    def __init__(self, size):
+        rc = _style("paper")
+        self.fig = Figure(figsize=size, facecolor=rc['figure.facecolor'])
+        FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.add_subplot()
+        ax.set_facecolor(rc['axes.facecolor'])
+        for spine in ax.spines.values():
+            spine.set_edgecolor(rc['axes.edgecolor'])
+            spine.set_linewidth(rc['axes.linewidth'])
+        ax.tick_params(labelsize=rc['xtick.labelsize'], labelcolor=rc['xtick.color'],
+            bottom=rc['xtick.bottom'], left=rc['ytick.left'])
+        ax.xaxis_date()
+        label = {'fontsize': rc['axes.labelsize'], 'color': rc['axes.labelcolor']}
+        ax.set_xlabel("Date", **label)
+        ax.set_ylabel("Cycle Length (days)", **label)
+        ax.set_ylim(15, 35)
+        ax.set_title("Your data", fontsize=rc['axes.titlesize'], color=rc['text.color'])
+        # NaN in the line data interrupt the line when data are missing
+        self.line, = ax.plot([], [], linestyle=':', linewidth=rc['lines.linewidth'])
+        self.scatter = ax.scatter([], [], s=rc['lines.markersize'] ** 2,
+            edgecolors=rc['patch.edgecolor'], linewidths=rc['patch.linewidth'])
+
+    def update(self, inputs):
+        x = mdates.date2num(inputs['date'].astype("datetime64[ns]"))
+        y = inputs['delta_clean']
+        style = inputs['style']
+        self.line.set_data(x, y)
+        self.line.set_color(style['c_ring'])
+        self.scatter.set_offsets(np.column_stack([x, y]))
+        self.scatter.set_facecolor(style['c_main'])
+        pad = max((x.max() - x.min()) * 0.05, 1) if len(x) > 0 else 1
+        lo, hi = (x.min(), x.max()) if len(x) > 0 else (0, 1)
+        self.ax.set_xlim(lo - pad, hi + pad)
+        return _png(self.fig)
+
+
+class PredFigure:
+    """Donut with the prediction text in the middle"""
+    def __init__(self, size):
+        rc = _style("talk")
+        self.fig = Figure(figsize=size, facecolor=rc['figure.facecolor'])
+        FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.add_subplot()
+        self.wedges, _ = ax.pie([1, 1], colors=["white", "white"],
+            startangle=90, counterclock=False,
+            wedgeprops={'linestyle': 'solid', 'antialiased': True})
+        self.inner_circle = Circle((0, 0), 0.7, color='white')  # to change pie into donut
+        ax.add_artist(self.inner_circle)
+        self.text = ax.text(0, 0, "",
+            horizontalalignment='center',
+            verticalalignment='center',
+            fontsize=20,
+            fontweight='bold',
+            color=rc['text.color'])
+
+    def update(self, inputs):
+        style = inputs['style']
+        parts = donut(inputs['delta_med'], inputs['time_med'])
+        total = sum(parts)
+        fraction = min(max(parts[0] / total, 0), 1) if total > 0 else 0
+        # Same angles as pie(startangle=90, counterclock=False)
+        split = 90 - 360 * fraction
+        self.wedges[0].set_theta1(split)
+        self.wedges[0].set_theta2(90)
+        self.wedges[1].set_theta1(-270)
+        self.wedges[1].set_theta2(split)
+        self.wedges[0].set_facecolor(style['c_ring'])
+        for patch in [*self.wedges, self.inner_circle]:
+            patch.set_edgecolor(style['c_outline'])
+            patch.set_linewidth(style['lw'])
+        self.text.set_text(pred_text(inputs['time_2575']))
+        return _png(self.fig)
+
+
+FIGURES = {'raw': RawFigure, 'pred': PredFigure}
+
+class FigurePool:
+    """Pre-built figures, one set per thread"""
+    def __init__(self):
+        self.local = threading.local()
+
+    def figure(self, kind, size):
+        figures = self.local.__dict__.setdefault('figures', {})
+        key = (kind, tuple(size))
+        if key not in figures:
+            figures[key] = FIGURES[kind](size)
+        return figures[key]
+
+    def render(self, inputs):
+        return self.figure(inputs['kind'], inputs['size']).update(inputs)
+
+pool = FigurePool()
+
+def render(inputs):
+    """Render with the figures of the current thread (base64 PNG, like plots.render)"""
+    return pool.render(inputs)
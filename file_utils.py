@@ -0,0 +1,81 @@
+import os
+import threading
+
+# Advisory file locks: fcntl on Linux/macOS, msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+def atomic_write(path, data):
+    """Write file so that readers see either the old or the new content, never a half-written file
+    Data go to a temp file which is flushed to disk and then renamed over the original
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def file_generation(*paths):
+    """Cheap fingerprint of files (inode, mtime, size) - changes whenever any file is written"""
+    generation = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            generation.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            generation.append(None)
+    return tuple(generation)
+
+
+class FileLock:
+    """Exclusive advisory lock on <path>, shared by processes that use the same path
+
+    The lock is reentrant within one FileLock instance, so methods holding
+    the lock can call other methods that take it too.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Read-only: closing it does not look like a write to file watchers
+            self._file = os.fdopen(os.open(self.path, os.O_RDONLY | os.O_CREAT, 0o666), "rb")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
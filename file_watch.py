@@ -0,0 +1,120 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+def _inotify_fd(directory):
+    """inotify descriptor watching directory (None if inotify is not available)"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+EVENT = struct.Struct("iIII")      # struct inotify_event: wd, mask, cookie, len (+ name)
+
+def _read_names(fd):
+    """Names of the files in all pending inotify events"""
+    names = set()
+    try:
+        while True:
+            data = os.read(fd, 4096)
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                names.add(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+                offset += length
+    except BlockingIOError:
+        pass
+    return names
+
+
+class TrackerWatcher:
+    """Watch tracker storage for changes made outside the app (sync tools, scripts)
+
+    Uses inotify on Linux (the directory of the storage source is watched, only
+    events of the source file, the CSV journal and the SQLite journals count -
+    not the lock file) and polls
+    every `interval` seconds elsewhere. On a change the tracker catches up with
+    reload_if_changed (reads only the appended tail if the files just grew);
+    statistics are recomputed and on_change(tracker) is called only if the
+    dates really changed.
+    lock: optional lock held while the tracker is updated (shared with the UI code)
+    """
+    def __init__(self, tracker, on_change=None, interval=1.0, use_inotify=True, lock=None):
+        self.tracker = tracker
+        self.on_change = on_change
+        self.interval = interval
+        self.use_inotify = use_inotify
+        self.lock = lock if lock is not None else threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+        self._names = set()
+
+    def check(self):
+        """One check for external changes, returns True if the dates changed"""
+        with self.lock:
+            changed = self.tracker.reload_if_changed()
+            if changed:
+                self.tracker.update_stats()
+        if changed and self.on_change is not None:
+            self.on_change(self.tracker)
+        return changed
+
+    def start(self):
+        path = os.path.abspath(self.tracker.storage.source)
+        directory = os.path.dirname(path)
+        name = os.path.basename(path)
+        self._names = {name, name + ".journal", name + "-wal", name + "-journal"}
+        self._fd = _inotify_fd(directory) if self.use_inotify else None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    @property
+    def mode(self):
+        return "inotify" if self._fd is not None else "polling"
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._fd is not None:
+                # Wait for any event in the directory (or timeout to check the stop flag)
+                ready, _, _ = select.select([self._fd], [], [], self.interval)
+                if not ready or not _read_names(self._fd) & self._names:
+                    continue
+            elif self._stop.wait(self.interval):
+                break
+            self.check()
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+from batch import last_days, pred_days, quantile_name, recent_deltas
+
+# Forecast of the next N cycles
+# Future cycle lengths are drawn with replacement from the recent clean deltas
+# (the same ones the single prediction uses), the k-th date is the last date +
+# sum of k drawn lengths. Quantiles over the samples give bands that widen
+# with every cycle. All users and samples are drawn at once with NumPy;
+# the generator is seeded, so a forecast can be reproduced.
+
+def bootstrap_quantiles(values, starts, counts, n_cycles=12, n_samples=1000,
+        qs=(0.25, 0.5, 0.75), seed=None, chunk=4_000_000):
+    """Quantiles of the total length of the next 1..n_cycles cycles for every segment
+    values[starts[u]:starts[u] + counts[u]] (resampled with replacement)
+    Returns array (segments x n_cycles x len(qs)), NaN for empty segments
+    chunk: max number of drawn cycles held in memory at once
+    """
+    rng = np.random.default_rng(seed)
+    values = np.asarray(values, dtype=float)
+    result = np.full((len(counts), n_cycles, len(qs)), np.nan)
+    rows = np.flatnonzero(np.asarray(counts) > 0)
+    per_chunk = max(chunk // max(n_samples * n_cycles, 1), 1)
+    for i in range(0, len(rows), per_chunk):
+        r = rows[i:i + per_chunk]
+        picks = rng.integers(0, counts[r][:, None, None], size=(len(r), n_samples, n_cycles))
+        total = np.cumsum(values[starts[r][:, None, None] + picks], axis=2)
+        result[r] = np.moveaxis(np.quantile(total, qs, axis=1), 0, -1)
+    return result
+
+def _dates(last, quantiles):
+    return pred_days(last, quantiles).astype("datetime64[D]")
+
+def forecast(last_day, deltas, n_cycles=12, n_samples=1000, qs=(0.25, 0.5, 0.75), seed=None):
+    """Next n_cycles dates after last_day (day number) from the cycle lengths deltas
+    Returns DataFrame with cycle (1, 2, ...) and one column per quantile (pred25, pred50, ...)
+    """
+    deltas = np.asarray(deltas, dtype=float)
+    quantiles = bootstrap_quantiles(deltas, np.array([0]), np.array([len(deltas)]),
+        n_cycles, n_samples, qs, seed)[0]
+    result = pd.DataFrame({'cycle': np.arange(1, n_cycles + 1)})
+    for k, q in enumerate(qs):
+        result[f"pred{quantile_name(q)}"] = _dates(last_day, quantiles[:, k]).astype("datetime64[ns]")
+    return result
+
+def forecast_batch(days, offsets, n_cycles=12, n_samples=1000, seed=None,
+        n_window=36, n_recent=12, gap_max=35, qs=(0.25, 0.5, 0.75)):
+    """Forecasts for all users (days/offsets as in batch.py), returns dict of arrays
+    last: datetime64[D] per user
+    pred25, pred50, pred75: datetime64[D], users x n_cycles (NaT where there is no prediction)
+    """
+    days = np.asarray(days, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    values, starts, counts = recent_deltas(days, offsets, n_window, n_recent, gap_max)
+    counts = np.where(counts >= 3, counts, 0)     # same minimum as the single prediction
+    quantiles = bootstrap_quantiles(values, starts, counts, n_cycles, n_samples, qs, seed)
+    last = last_days(days, offsets)
+    result = {"last": last.astype("datetime64[D]")}
+    enough = counts > 0
+    for k, q in enumerate(qs):
+        pred = np.full((len(counts), n_cycles), np.datetime64("NaT"), dtype="datetime64[D]")
+        pred[enough] = _dates(last[enough, None], quantiles[enough, :, k])
+        result[f"pred{quantile_name(q)}"] = pred
+    return result
@@ -0,0 +1,74 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+from order_stats import SlidingQuantiles
+
+class RollingStats:
+    """Rolling state behind CycleTracker.process_data, updated in O(1) when a date is appended
+
+    Keeps the same windows as process_data:
+    - the last n_window dates (deltas are only computed inside this window)
+    - clean deltas (delta <= gap_max) in the window, the last n_recent of them are used for prediction
+    Dates are day numbers (days since 1970-01-01).
+    """
+    def __init__(self, n_window=36, n_recent=12, gap_max=35):
+        self.n_window = n_window
+        self.n_recent = n_recent
+        self.gap_max = gap_max
+        self.reset([])
+
+    def reset(self, days):
+        """Full rebuild from sorted day numbers"""
+        self.window = deque(maxlen=self.n_window)   # (position, day)
+        self.clean = deque()                        # (position, delta) of clean deltas in the window
+        self.recent_q = SlidingQuantiles(self.n_recent)   # the last n_recent clean deltas
+        # n = number of dates seen = position of the next date; only the window is replayed
+        offset = max(len(days) - self.n_window, 0)
+        self.n = offset
+        for day in np.asarray(days)[offset:].tolist():
+            self.append(day)
+
+    def append(self, day):
+        """Add date later than all previous ones"""
+        if self.window and day <= self.window[-1][1]:
+            raise ValueError("RollingStats.append needs dates in increasing order")
+        previous = self.window[-1][1] if self.window else None
+        self.window.append((self.n, day))
+        # The first date in the window has no delta (diff is computed inside the window)
+        first = self.window[0][0]
+        while self.clean and self.clean[0][0] <= first:
+            if len(self.clean) <= self.n_recent:    # the oldest clean delta is one of the recent ones
+                self.recent_q.remove_oldest()
+            self.clean.popleft()
+        if previous is not None and self.n > first:
+            delta = day - previous
+            if not delta > self.gap_max:
+                self.clean.append((self.n, delta))
+                self.recent_q.push(float(delta))
+        self.n += 1
+
+    def recent(self):
+        """Last n_recent clean deltas as (position, delta)"""
+        return list(self.clean)[-self.n_recent:]
+
+    def quantiles(self, qs=(0.25, 0.5, 0.75)):
+        """Quantiles of the recent clean deltas (None if there are less than 3)"""
+        if len(self.recent_q) < 3:
+            return None
+        return [self.recent_q.quantile(q) for q in qs]
+
+    def last_day(self):
+        return self.window[-1][1] if self.window else None
+
+    def frames(self):
+        """df and recent DataFrames as built by process_data"""
+        positions = [pos for pos, _ in self.window]
+        days = np.array([day for _, day in self.window], dtype=np.int64)
+        delta = np.full(len(days), np.nan)
+        delta[1:] = np.diff(days)
+        df = pd.DataFrame(
+            {'date': days.astype("datetime64[D]").astype("datetime64[ns]"), 'delta': delta},
+            index = pd.RangeIndex(positions[0], positions[-1] + 1) if positions else None)
+        df["delta_clean"] = np.select([(df["delta"] > self.gap_max)], [np.nan], default = df["delta"])
+        recent = df.loc[[pos for pos, _ in self.recent()]]
+        return df, recent
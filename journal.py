@@ -0,0 +1,167 @@
+import os
+import pandas as pd
+from file_utils import FileLock, atomic_write, file_generation
+
+# Journal records
+ADD = "add"
+DELETE = "del"
+
+class DateJournal:
+    """Append-only log of added/deleted dates stored next to the base CSV file
+
+    The base file (e.g. dates.csv) stays as it is, every change is appended
+    to <csv_file>.journal as one "add,<date>" or "del,<date>" line.
+    Replaying the journal over the base file gives the current dates.
+    Once the journal grows over max_bytes it is compacted = merged into the base file.
+    All reads and writes hold an advisory lock on <csv_file>.lock, so several
+    processes can share one tracker; the base file is only ever replaced atomically.
+    """
+    def __init__(self, csv_file, max_bytes=64 * 1024):
+        self.csv_file = csv_file
+        self.path = f"{csv_file}.journal"
+        self.max_bytes = max_bytes
+        self.lock = FileLock(f"{csv_file}.lock")
+        self.offsets = {}   # path -> (inode, mtime, size, last bytes) of what was already read/written
+
+    def _remember_offsets(self):
+        for path in (self.csv_file, self.path):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self.offsets[path] = None
+                continue
+            self.offsets[path] = (st.st_ino, st.st_mtime_ns, st.st_size, self._bytes_before(path, st.st_size))
+
+    @staticmethod
+    def _bytes_before(path, offset, n=64):
+        """Last n bytes before offset, used to check that the file was only appended to"""
+        with open(path, "rb") as f:
+            f.seek(max(offset - n, 0))
+            return f.read(min(offset, n))
+
+    def _read_tail(self, path):
+        """Complete lines appended to path since the remembered offset
+        Returns None if the file was rewritten, replaced, shrunk or removed
+        """
+        old = self.offsets.get(path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return [] if old is None else None
+        if old is None:
+            start = 0
+        else:
+            inode, mtime, start, last_bytes = old
+            if st.st_ino != inode or st.st_size < start:
+                return None
+            if st.st_size == start and st.st_mtime_ns != mtime:     # rewritten in place
+                return None
+            if self._bytes_before(path, start) != last_bytes:
+                return None
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read()
+        end = start + data.rfind(b"\n") + 1     # a line that is still being written is left for later
+        self.offsets[path] = (st.st_ino, st.st_mtime_ns, end, self._bytes_before(path, end))
+        data = data[:end - start].decode()
+        return [line.strip() for line in data.splitlines() if line.strip()]
+
+    def read_changes(self):
+        """Records appended to the base file or the journal since the last load/save
+        Only the new tail of the files is read. Returns None if a full load is needed
+        """
+        with self.lock:
+            base = self._read_tail(self.csv_file)
+            journal = self._read_tail(self.path) if base is not None else None
+            if base is None or journal is None:
+                return None
+        records = [(ADD, line) for line in base]
+        for line in journal:
+            op, _, date_str = line.partition(",")
+            records.append((op, date_str))
+        return records
+
+    def generation(self):
+        """Fingerprint of base file + journal, changes with every write"""
+        return file_generation(self.csv_file, self.path)
+
+    def read_base(self):
+        """Read dates from the base file as a list of strings"""
+        if not os.path.exists(self.csv_file):
+            return []
+        try:
+            base = pd.read_csv(self.csv_file, header=None, names=['date'])
+        except pd.errors.EmptyDataError:    # all dates were deleted
+            return []
+        return base['date'].tolist()
+
+    def read(self):
+        """Read journal records as a list of (op, date) tuples"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line:
+                    continue
+                op, _, date_str = line.partition(",")
+                records.append((op, date_str))
+        return records
+
+    @staticmethod
+    def replay(values, records):
+        """Apply journal records to a list of dates, same rules as add_date/delete_date"""
+        values = list(values)
+        for op, date_str in records:
+            if op == ADD:
+                if date_str not in values:
+                    values.append(date_str)
+            elif op == DELETE:
+                values = [x for x in values if x != date_str]
+        return values
+
+    def load(self):
+        """Load base file + replay journal, returns sorted dates DataFrame"""
+        with self.lock:
+            values = self.replay(self.read_base(), self.read())
+            self._remember_offsets()
+        if len(values) == 0 and not os.path.exists(self.csv_file):
+            return pd.DataFrame(columns=['date'])
+        dates = pd.DataFrame({'date': values})
+        return dates.sort_values("date").reset_index(drop=True)
+
+    def append(self, op, date_str):
+        """Append one record to the journal"""
+        self.append_many([(op, date_str)])
+
+    def append_many(self, records):
+        """Append several records to the journal in one write"""
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write("".join(f"{op},{date_str}\n" for op, date_str in records))
+                f.flush()
+                os.fsync(f.fileno())
+            self._remember_offsets()
+
+    def size(self):
+        """Journal size in bytes"""
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path)
+
+    def needs_compaction(self):
+        return self.size() > self.max_bytes
+
+    def compact(self):
+        """Merge the journal into the base file and start a new empty journal
+        If the process dies between the two steps, the old journal is replayed
+        over the new base file, which gives the same dates (replay is idempotent)
+        """
+        with self.lock:
+            dates = self.load()
+            atomic_write(self.csv_file, dates.to_csv(index=False, header=False))
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._remember_offsets()
+        return dates
@@ -1,16 +1,28 @@
+import asyncio
+import logging
+import multiprocessing
+from datetime import datetime
+import matplotlib
 import flet as ft
 from config import c_main
 from cycle_tracker import CycleTracker
+from async_tracker import AsyncCycleTracker
+from file_watch import TrackerWatcher
+from clock import DayScheduler
+from render_service import RenderService
 
 matplotlib.use("Agg")
 
+# Plots are rendered in worker processes shared by all sessions
+# The workers start lazily, when threads (Flet, watchers) are already running -> spawn, not fork
+render_service = RenderService(mp_context=multiprocessing.get_context("spawn"))
+
 def main(page: ft.Page):
     page.title = "PEriodTRAcker"
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
-    today = datetime.now().strftime('%Y-%m-%d')
     
-    # Initialize tracker
-    tracker = CycleTracker()
+    # Initialize tracker (async wrapper = file I/O and plots don't block the UI)
+    tracker = AsyncCycleTracker(CycleTracker(), render_service=render_service)
     
     # Navigation functions
     def navigate_to_data(e):
@@ -20,8 +32,10 @@ def main(page: ft.Page):
         page.go("/")
     
     # Event handlers
-    def add_today(e):
-        if not tracker.add_date(today):
+    async def add_today(e):
+        view = await tracker.snapshot()
+        today = view['today'].strftime('%Y-%m-%d')    # not fixed at start, the app may run for days
+        if not await tracker.add_date(today):
             page.snack_bar = ft.SnackBar(
                 content=ft.Text("Already there \N{THUMBS UP SIGN}"),
                 open=True)
@@ -29,12 +43,12 @@ def main(page: ft.Page):
             page.snack_bar = ft.SnackBar(
                 content=ft.Text("Date added successfully!"),
                 open=True)
-        route_change(page.route)
+        await route_change(page.route)
         page.update()
     
-    def add_selected(e):
+    async def add_selected(e):
         date_str = e.control.value.strftime('%Y-%m-%d')
-        if not tracker.add_date(date_str):
+        if not await tracker.add_date(date_str):
             page.snack_bar = ft.SnackBar(
                 content=ft.Text("Already there \N{THUMBS UP SIGN}"),
                 open=True)
@@ -42,7 +56,7 @@ def main(page: ft.Page):
             page.snack_bar = ft.SnackBar(
                 content=ft.Text("Date added successfully!"),
                 open=True)
-        route_change(page.route)
+        await route_change(page.route)
         page.update()
     
     def delete_date_handler(date_str):
@@ -52,13 +66,13 @@ def main(page: ft.Page):
                 dialog.open = False
                 page.update()
             
-            def confirm_delete(e):
-                if tracker.delete_date(date_str):
+            async def confirm_delete(e):
+                if await tracker.delete_date(date_str):
                     page.snack_bar = ft.SnackBar(
                         content=ft.Text("Date deleted successfully!"),
                         open=True)
                     dialog.open = False
-                    route_change(page.route)
+                    await route_change(page.route)
                 else:
                     page.snack_bar = ft.SnackBar(
                         content=ft.Text("Error deleting date"),
@@ -80,9 +94,9 @@ def main(page: ft.Page):
         return handler
     
     # Data table 
-    def build_data_table():
+    def build_data_table(dates):
         """Build the data table with delete buttons"""
-        all_dates = tracker.dates.sort_values("date", ascending=False)['date'].tolist()
+        all_dates = dates[::-1]    # newest first
         
         if len(all_dates) == 0:
             return ft.Text("No dates recorded yet", size=16)
@@ -116,7 +130,7 @@ def main(page: ft.Page):
     # UI elements (buttons)
     add_today_button = ft.FilledButton(
         text="Add today",
-        on_click=lambda e: add_today(e),
+        on_click=add_today,
         style=ft.ButtonStyle(
             color=ft.Colors.WHITE, 
             bgcolor=c_main,
@@ -151,7 +165,20 @@ def main(page: ft.Page):
     )
 
     # Route change handler
-    def route_change(route):
+    async def route_change(route):
+        await tracker.reload_if_changed()    # data may have been changed by another session
+        # The previous image is shown until the new one is rendered
+        pred_image, pred_pending = await tracker.plot_latest("pred")
+        raw_image, raw_pending = await tracker.plot_latest("raw") if page.route == "/data" else (None, None)
+        pending = [image for image in (pred_pending, raw_pending) if image is not None]
+        view = await tracker.snapshot()     # read under the tracker lock, not on the loop thread
+        table = await tracker.probability_table(bandwidth=1.0)
+        if table is not None:
+            today = view['today']
+            chance_text = (f"Chance today: {table.probability(today):.0%}, "
+                f"by today: {table.cumulative(today):.0%}")
+        else:
+            chance_text = ""
         page.views.clear()
         
         # Main page
@@ -167,21 +194,25 @@ def main(page: ft.Page):
                     ft.Column([
                         ft.Row(
                             [ft.Text(
-                                f"Estimated next date: {tracker.pred_date}", 
+                                f"Estimated next date: {view['pred_date']}", 
                                 #color=c_main,
                                 weight=ft.FontWeight.BOLD)],
                             alignment=ft.MainAxisAlignment.CENTER,
                         ),
+                        ft.Row(
+                            [ft.Text(chance_text)],
+                            alignment=ft.MainAxisAlignment.CENTER,
+                        ),
                         ft.Row(
                             [ft.Image(
-                                src_base64=tracker.plot_pred(),
+                                src_base64=pred_image,
                                 width=600,
                                 height=300,
                             )],
                             alignment=ft.MainAxisAlignment.CENTER,
                         ),
                         ft.Row(
-                            [ft.Text(f"Last date: {tracker.dates['date'].iloc[-1] if len(tracker.dates) > 0 else 'N/A'}")],
+                            [ft.Text(f"Last date: {view['dates'][-1] if len(view['dates']) > 0 else 'N/A'}")],
                             alignment=ft.MainAxisAlignment.CENTER,
                         ),
                         ft.Container(
@@ -218,14 +249,14 @@ def main(page: ft.Page):
                         ft.Column([
                             ft.Row(
                                 [ft.Image(
-                                    src_base64=tracker.plot_raw(),
+                                    src_base64=raw_image,
                                     width=600,
                                     height=300,
                                 )],
                                 alignment=ft.MainAxisAlignment.CENTER,
                             ),
                             ft.Row(
-                                [build_data_table()],
+                                [build_data_table(view['dates'])],
                                 #padding=20
                                 alignment=ft.MainAxisAlignment.CENTER,
                             ),
@@ -236,10 +267,41 @@ def main(page: ft.Page):
             )
         
         page.update()
+        if pending:
+            page.run_task(redraw_when_rendered, pending)
+
+    async def redraw_when_rendered(pending):
+        try:
+            await asyncio.gather(*pending)
+        except Exception:
+            # Keep showing the previous image, the next change renders again
+            logging.exception("Plot rendering failed")
+            return
+        await route_change(page.route)
     
     # Set up routing
     page.on_route_change = route_change
+
+    # Refresh the page when the data file is changed outside the app
+    watcher = TrackerWatcher(
+        tracker.tracker,
+        on_change=lambda _: page.run_task(route_change, page.route),
+        lock=tracker.thread_lock).start()
+    # "Days until" changes at midnight without any change of the data
+    scheduler = DayScheduler(
+        [tracker.tracker],
+        on_rollover=lambda _: page.run_task(route_change, page.route),
+        lock=tracker.thread_lock).start()
+
+    def disconnect(e):
+        watcher.stop()
+        scheduler.stop()
+    page.on_disconnect = disconnect
     page.go(page.route)
 
 
-ft.app(main)
\ No newline at end of file
+if __name__ == "__main__":    # worker processes of the render service import this module too
+    try:
+        ft.app(main)
+    finally:
+        render_service.shutdown(wait=False)
\ No newline at end of file
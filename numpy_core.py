@@ -0,0 +1,51 @@
+import time
+from datetime import date
+import numpy as np
+from date_parser import EPOCH_ORDINAL
+from order_stats import quantile_sorted
+
+# NumPy compute core for CycleTracker (backend="numpy")
+# Same rules and same numbers as the pandas process_data, but on plain
+# int day-number arrays: no DataFrame copy, no to_datetime, no dropna/tail.
+
+def window_deltas(days, n_window=36, gap_max=35):
+    """Last n_window days + their delta and clean delta (NaN for the first one and for gaps)"""
+    window = np.asarray(days[-n_window:], dtype=np.int64)
+    delta = np.full(len(window), np.nan)
+    delta[1:] = np.diff(window)
+    delta_clean = np.where(delta > gap_max, np.nan, delta)
+    return window, delta, delta_clean
+
+def recent_quantiles(delta_clean, n_recent=12, qs=(0.25, 0.5, 0.75)):
+    """Quantiles of the last n_recent clean deltas (None if there are less than 3)"""
+    recent = delta_clean[~np.isnan(delta_clean)][-n_recent:]
+    if len(recent) < 3:
+        return None
+    recent = np.sort(recent).tolist()
+    return [quantile_sorted(recent, q) for q in qs]
+
+def compute(days, n_window=36, n_recent=12, gap_max=35, qs=(0.25, 0.5, 0.75)):
+    """Last day and quantiles of the recent clean deltas (None if not enough data)"""
+    if len(days) == 0:
+        return None, None
+    _, _, delta_clean = window_deltas(days, n_window, gap_max)
+    return int(days[-1]), recent_quantiles(delta_clean, n_recent, qs)
+
+def day_to_date(day):
+    return date.fromordinal(EPOCH_ORDINAL + day)
+
+def benchmark(tracker, repeat=200):
+    """Seconds per full recompute (process_data) with each backend"""
+    backend = tracker.backend
+    result = {}
+    try:
+        for name in ["pandas", "numpy"]:
+            tracker.backend = name
+            start = time.perf_counter()
+            for _ in range(repeat):
+                tracker.process_data()
+            result[name] = (time.perf_counter() - start) / repeat
+    finally:
+        tracker.backend = backend
+        tracker.process_data()
+    return result
@@ -0,0 +1,83 @@
+import math
+from bisect import bisect_left, insort
+from collections import deque
+import numpy as np
+
+# Order statistics over a sliding window
+# Values are kept twice: in arrival order (to know what leaves the window)
+# and sorted (binary search for insert/evict, quantile is a direct lookup)
+
+def virtual_index(n, q):
+    """Position of quantile q in n sorted values (method 'linear', like numpy/pandas)"""
+    return (n - 1) * q
+
+def lerp(a, b, t):
+    """Linear interpolation from the nearer end, like numpy (scalars or arrays)"""
+    diff = b - a
+    if np.ndim(t) == 0:
+        return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+def quantile_sorted(values, q):
+    """Quantile of sorted values with linear interpolation
+    Same arithmetic as numpy/pandas quantile (method 'linear'), so the results are bit-identical
+    """
+    n = len(values)
+    virtual = virtual_index(n, q)
+    if virtual >= n - 1:
+        return float(values[-1])
+    if virtual < 0:
+        return float(values[0])
+    below = math.floor(virtual)
+    return lerp(float(values[below]), float(values[below + 1]), virtual - below)
+
+
+class SlidingQuantiles:
+    """Quantiles of the last `window` values, updated in O(log w) per value
+
+    NaN values take a place in the window (like in pandas rolling) but are
+    not used for the quantiles.
+    """
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()   # arrival order, NaN included
+        self.sorted = []        # non-NaN values, sorted
+
+    def __len__(self):
+        """Number of non-NaN values in the window"""
+        return len(self.sorted)
+
+    def push(self, value):
+        """Add value, the oldest one leaves when the window is full"""
+        if len(self.values) == self.window:
+            self.remove_oldest()
+        self.values.append(value)
+        if not math.isnan(value):
+            insort(self.sorted, value)
+
+    def remove_oldest(self):
+        value = self.values.popleft()
+        if not math.isnan(value):
+            del self.sorted[bisect_left(self.sorted, value)]
+        return value
+
+    def quantile(self, q):
+        """Linear-interpolated quantile (NaN if the window has no values)"""
+        if len(self.sorted) == 0:
+            return np.nan
+        return quantile_sorted(self.sorted, q)
+
+
+def rolling_quantile(values, window, q, min_periods=None):
+    """Rolling quantile over the whole series, like pd.Series.rolling(window, min_periods).quantile(q)
+    (rolling median = q 0.5), in O(n log w) instead of recomputing every window
+    """
+    if min_periods is None:
+        min_periods = window
+    sliding = SlidingQuantiles(window)
+    result = np.full(len(values), np.nan)
+    for i, value in enumerate(np.asarray(values, dtype=float).tolist()):
+        sliding.push(value)
+        if len(sliding) >= max(min_periods, 1):
+            result[i] = sliding.quantile(q)
+    return result
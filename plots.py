@@ -0,0 +1,98 @@
+import io
+import base64
+import matplotlib.pyplot as plt
+import seaborn as sns
+from config import c_main, c_ring, c_outline, lw
+
+# Plots of CycleTracker as base64 PNG
+# Renderers only get plain values (render inputs, see CycleTracker.render_inputs),
+# so the result depends on nothing else and can be cached by a hash of the inputs.
+
+# Everything from config.py that changes the look of the plots
+STYLE = {'c_main': c_main, 'c_ring': c_ring, 'c_outline': c_outline, 'lw': lw}
+
+def pred_text(time_2575):
+    """Prediction text in the middle of the donut"""
+    time_abs = [abs(x) for x in time_2575]
+
+    if time_2575 == [1]:
+        range = "1 day"
+    elif len(time_2575) == 1:
+        range =  f"{time_2575} days"
+    else:
+        range = f"{min(time_abs)} - {max(time_abs)} days"
+
+    if max(time_2575) < 0:
+        return f"Period was due {range} ago"
+    elif min(time_2575) <= 0 <= max(time_2575):
+        return f"Period is due"
+    else:
+        return f"Next period\nin {range}"
+
+def donut(delta_med_days, time_med):
+    """Ring parts: days passed, days remaining"""
+    return [
+        delta_med_days - max(time_med, 0),
+        max(time_med, 0)
+    ]
+
+def _png(fig):
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', bbox_inches='tight')
+    buf.seek(0)
+    plt.close(fig)
+    return base64.b64encode(buf.read()).decode()
+
+def render_raw(inputs):
+    """Create plot of raw data as base64 string"""
+    style = inputs['style']
+    date = inputs['date'].astype("datetime64[ns]")
+    delta_clean = inputs['delta_clean']
+
+    sns.set_style("white")
+    sns.set_context("paper")
+
+    fig_raw, ax = plt.subplots(figsize=inputs['size'])
+    ax.scatter(date, delta_clean, color = style['c_main'])
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Cycle Length (days)")
+    ax.set_ylim(15, 35)
+    ax.set_title("Your data")
+
+    # One line for all segments: NaN in delta_clean interrupt it when data are missing
+    ax.plot(date, delta_clean, linestyle = ':', color = style['c_ring'])
+
+    return _png(fig_raw)
+
+def render_pred(inputs):
+    """Create prediction plot as base64 string"""
+    style = inputs['style']
+    text = pred_text(inputs['time_2575'])
+    parts = donut(inputs['delta_med'], inputs['time_med'])
+    inner_circle = plt.Circle( (0,0), 0.7, color = 'white', ec = style['c_outline'], linewidth = style['lw']) # to change pie into donut
+
+    sns.set_style("white")
+    sns.set_context("talk")
+    #sns.set_context("paper")
+    fig_pred, ax = plt.subplots(figsize = inputs['size'])
+
+    ax.pie(parts, colors = [style['c_ring'], "white"],
+        startangle=90, counterclock=False,
+        wedgeprops = {"edgecolor":style['c_outline'],'linewidth': style['lw'], 'linestyle': 'solid', 'antialiased': True})
+    p_pred = plt.gcf() # get current figure
+    p_pred.gca().add_artist(inner_circle) # get current axes + adds circle
+
+    plt.text(0, 0,                   # coordinates (center)
+        text,
+        horizontalalignment = 'center',
+        verticalalignment = 'center',
+        fontsize = 20,
+        fontweight ='bold')
+
+    return _png(fig_pred)
+
+RENDERERS = {'raw': render_raw, 'pred': render_pred}
+
+def render(inputs):
+    """Render plot described by render inputs"""
+    return RENDERERS[inputs['kind']](inputs)
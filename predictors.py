@@ -0,0 +1,281 @@
+import math
+from abc import ABC, abstractmethod
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from batch import clean_deltas, pred_days, recent_deltas, segment_quantiles
+from incremental import RollingStats
+from order_stats import SlidingQuantiles
+
+# Predictors of the next cycle length
+# Every predictor works on one user's dates (day numbers, increasing) with
+#   reset(days)    full rebuild
+#   update(day)    add a date later than all previous ones (incremental)
+#   predict()      predicted cycle length in days, None if there is not enough data
+# and on many users at once with predict_batch(days, offsets) (layout of batch.py,
+# NaN = no prediction). The predicted date is the last date + floor(length) days.
+# Predictors are registered by name; benchmark() compares them on speed and accuracy.
+
+PREDICTORS = {}
+
+def register(name):
+    """Class decorator adding a predictor to the registry"""
+    def decorator(cls):
+        cls.name = name
+        PREDICTORS[name] = cls
+        return cls
+    return decorator
+
+def get_predictor(name, **params):
+    """New predictor from the registry"""
+    if name not in PREDICTORS:
+        raise ValueError(f"Unknown predictor: {name} (available: {', '.join(PREDICTORS)})")
+    return PREDICTORS[name](**params)
+
+class Predictor(ABC):
+    """Base class, subclasses implement clear, update, predict and predict_batch"""
+    name = None
+
+    def reset(self, days):
+        """Rebuild the state from sorted day numbers"""
+        self.clear()
+        for day in np.asarray(days).tolist():
+            self.update(day)
+
+    @abstractmethod
+    def clear(self):
+        """Forget all dates"""
+
+    @abstractmethod
+    def update(self, day):
+        """Add a date later than all previous ones"""
+
+    @abstractmethod
+    def predict(self):
+        """Predicted cycle length in days, None if there is not enough data"""
+
+    @abstractmethod
+    def predict_batch(self, days, offsets):
+        """Predicted cycle length of every user (NaN = no prediction)"""
+
+
+class _DeltaPredictor(Predictor):
+    """Predictor fed with the clean deltas of the whole history (gaps > gap_max are NaN)"""
+    def __init__(self, gap_max=35):
+        self.gap_max = gap_max
+        self.clear()
+
+    def clear(self):
+        self.last_day = None
+
+    def update(self, day):
+        if self.last_day is not None and day <= self.last_day:
+            raise ValueError(f"{type(self).__name__}.update needs dates in increasing order")
+        delta = np.nan if self.last_day is None else float(day - self.last_day)
+        self.last_day = day
+        self.push(np.nan if delta > self.gap_max else delta)
+
+    @abstractmethod
+    def push(self, delta):
+        """Add the next clean delta (NaN for the first date and gaps)"""
+
+
+@register("quantile")
+class QuantileWindow(Predictor):
+    """Quantile of the last n_recent clean deltas within the last n_window dates (the CycleTracker rule)"""
+    def __init__(self, q=0.5, n_window=36, n_recent=12, gap_max=35):
+        self.q = q
+        self.stats = RollingStats(n_window, n_recent, gap_max)
+
+    def reset(self, days):
+        self.stats.reset(days)
+
+    def clear(self):
+        self.stats.reset([])
+
+    def update(self, day):
+        self.stats.append(day)
+
+    def predict(self):
+        quantiles = self.stats.quantiles((self.q,))
+        return None if quantiles is None else quantiles[0]
+
+    def predict_batch(self, days, offsets):
+        values, starts, counts = recent_deltas(np.asarray(days, dtype=np.int64),
+            np.asarray(offsets, dtype=np.int64),
+            self.stats.n_window, self.stats.n_recent, self.stats.gap_max)
+        result = segment_quantiles(values, starts, counts, self.q)
+        result[counts < 3] = np.nan
+        return result
+
+
+@register("rolling_median")
+class RollingMedian(_DeltaPredictor):
+    """Median of the clean deltas of the last `window` dates (old/predictor.py: window 10, min_periods 2)
+    Like pandas rolling, the first date and gaps take a place in the window as NaN
+    """
+    def __init__(self, window=10, min_periods=2, gap_max=35):
+        self.window = window
+        self.min_periods = min_periods
+        super().__init__(gap_max)
+
+    def clear(self):
+        super().clear()
+        self.sliding = SlidingQuantiles(self.window)
+
+    def push(self, delta):
+        self.sliding.push(delta)
+
+    def predict(self):
+        if len(self.sliding) < max(self.min_periods, 1):
+            return None
+        return self.sliding.quantile(0.5)
+
+    def predict_batch(self, days, offsets):
+        days = np.asarray(days, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        counts = np.diff(offsets)
+        # Deltas of the last window + 1 dates = the last window deltas
+        delta, user = clean_deltas(days, offsets, self.window + 1, self.gap_max)
+        selected = ~np.isnan(delta)
+        sel_user = user[selected]
+        values = delta[selected][np.lexsort((delta[selected], sel_user))]
+        n_used = np.bincount(sel_user, minlength=len(counts))
+        starts = np.zeros(len(counts), dtype=np.int64)
+        starts[1:] = np.cumsum(n_used)[:-1]
+        result = segment_quantiles(values, starts, n_used, 0.5)
+        result[n_used < max(self.min_periods, 1)] = np.nan
+        return result
+
+
+@register("ewm")
+class ExponentialMean(_DeltaPredictor):
+    """Exponentially weighted mean of the clean deltas: m = alpha * delta + (1 - alpha) * m"""
+    def __init__(self, alpha=0.3, min_periods=3, gap_max=35):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        super().__init__(gap_max)
+
+    def clear(self):
+        super().clear()
+        self.mean = None
+        self.n = 0
+
+    def push(self, delta):
+        if math.isnan(delta):
+            return
+        self.mean = delta if self.mean is None else self.alpha * delta + (1 - self.alpha) * self.mean
+        self.n += 1
+
+    def predict(self):
+        if self.n < max(self.min_periods, 1):
+            return None
+        return self.mean
+
+    def predict_batch(self, days, offsets):
+        days = np.asarray(days, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        n_users = len(offsets) - 1
+        delta, user = clean_deltas(days, offsets, None, self.gap_max)
+        clean = ~np.isnan(delta)
+        user, delta = user[clean], delta[clean]
+        # The recursion unrolled: the i-th of n clean deltas has weight
+        # (1 - alpha)^(n - 1 - i), times alpha except for the first one
+        n = np.bincount(user, minlength=n_users)
+        first = np.zeros(n_users, dtype=np.int64)
+        first[1:] = np.cumsum(n)[:-1]
+        i = np.arange(len(delta)) - first[user]
+        weight = (1 - self.alpha) ** (n[user] - 1 - i) * np.where(i > 0, self.alpha, 1.0)
+        result = np.bincount(user, weight * delta, minlength=n_users)
+        result[n < max(self.min_periods, 1)] = np.nan
+        return result
+
+
+@register("trimmed")
+class TrimmedMean(QuantileWindow):
+    """Mean of the recent clean deltas (CycleTracker window) without the lowest and highest trim fraction"""
+    def __init__(self, trim=0.2, n_window=36, n_recent=12, gap_max=35):
+        super().__init__(0.5, n_window, n_recent, gap_max)
+        self.trim = trim
+
+    def predict(self):
+        values = self.stats.recent_q.sorted
+        n = len(values)
+        if n < 3:
+            return None
+        k = int(n * self.trim)
+        return sum(values[k:n - k]) / (n - 2 * k)
+
+    def predict_batch(self, days, offsets):
+        values, starts, counts = recent_deltas(np.asarray(days, dtype=np.int64),
+            np.asarray(offsets, dtype=np.int64),
+            self.stats.n_window, self.stats.n_recent, self.stats.gap_max)
+        user = np.repeat(np.arange(len(counts)), counts)
+        rank = np.arange(len(values)) - starts[user]
+        k = (counts * self.trim).astype(np.int64)
+        keep = (rank >= k[user]) & (rank < counts[user] - k[user])
+        total = np.bincount(user[keep], values[keep], minlength=len(counts))
+        used = np.bincount(user[keep], minlength=len(counts))
+        result = np.full(len(counts), np.nan)
+        enough = counts >= 3
+        result[enough] = total[enough] / used[enough]
+        return result
+
+
+def benchmark(days, offsets, names=None, params=None, max_cycle=35, memory_users=200):
+    """Compare predictors on a corpus (days/offsets as in batch.py)
+    params: {name: keyword arguments} for the predictors
+    Returns DataFrame, one row per predictor:
+    update_us (update + predict per date), batch_us (predict_batch per user),
+    bytes_per_user (state of one incremental predictor, measured with tracemalloc),
+    n, mae (replay of every date, predicted vs next date for cycles <= max_cycle)
+    """
+    days = np.asarray(days, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    names = list(PREDICTORS) if names is None else names
+    params = params or {}
+    histories = [days[offsets[u]:offsets[u + 1]].tolist() for u in range(len(offsets) - 1)]
+    rows = []
+    for name in names:
+        predictor = get_predictor(name, **params.get(name, {}))
+        # Incremental replay: at every date, predict the next one
+        elapsed = 0.0
+        errors = []
+        for history in histories:
+            predictor.clear()
+            for i, day in enumerate(history):
+                start = time.perf_counter()
+                predictor.update(day)
+                length = predictor.predict()
+                elapsed += time.perf_counter() - start
+                if length is not None and i + 1 < len(history) and history[i + 1] - day <= max_cycle:
+                    errors.append(pred_days(day, length) - history[i + 1])
+
+        start = time.perf_counter()
+        predictor.predict_batch(days, offsets)
+        batch_time = time.perf_counter() - start
+
+        # Memory of the incremental state, one predictor per user
+        sample = histories[:memory_users]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        states = []
+        for history in sample:
+            state = get_predictor(name, **params.get(name, {}))
+            state.reset(history)
+            states.append(state)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del states
+
+        errors = np.abs(np.array(errors, dtype=float))
+        rows.append({
+            'predictor': name,
+            'update_us': elapsed / max(len(days), 1) * 1e6,
+            'batch_us': batch_time / max(len(histories), 1) * 1e6,
+            'bytes_per_user': used / max(len(sample), 1),
+            'n': len(errors),
+            'mae': errors.mean() if len(errors) > 0 else np.nan,
+        })
+    return pd.DataFrame(rows)
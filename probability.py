@@ -0,0 +1,125 @@
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from batch import last_days, recent_deltas
+from date_parser import EPOCH_ORDINAL, parse_date
+
+# Probability of the next date for every day after the last date
+# The empirical distribution of the recent clean deltas (the ones behind the
+# 25/50/75% prediction), optionally smoothed with a Gaussian kernel, as a
+# probability mass per day offset. Lookups by date are a single array index.
+
+def gaussian_kernel(bandwidth):
+    """Discrete Gaussian kernel (sums to 1) with standard deviation bandwidth days"""
+    radius = int(np.ceil(3 * bandwidth))
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (x / bandwidth) ** 2)
+    return kernel / kernel.sum()
+
+def delta_pmf(values, counts, horizon=60, bandwidth=0.0):
+    """Probability of each delta 0..horizon days for consecutive segments of values
+    (segment u = the next counts[u] values, like recent_deltas returns them)
+    Returns array (segments x horizon + 1); all zero for empty segments
+    Mass smoothed beyond the horizon (or below 0) is dropped, so rows can sum to less than 1
+    """
+    counts = np.asarray(counts)
+    n = len(counts)
+    size = horizon + 1
+    segment = np.repeat(np.arange(n), counts)
+    delta = np.asarray(values).astype(np.int64)
+    keep = (delta >= 0) & (delta <= horizon)
+    weight = 1.0 / counts[segment[keep]]
+    pmf = np.bincount(segment[keep] * size + delta[keep], weight, minlength=n * size).reshape(n, size)
+    if bandwidth > 0:
+        # Shift-and-add per kernel tap, vectorized over segments
+        kernel = gaussian_kernel(bandwidth)
+        radius = len(kernel) // 2
+        smoothed = np.zeros_like(pmf)
+        for tap, w in enumerate(kernel):
+            shift = tap - radius
+            if shift >= 0:
+                smoothed[:, shift:] += w * pmf[:, :size - shift]
+            else:
+                smoothed[:, :shift] += w * pmf[:, -shift:]
+        pmf = smoothed
+    return pmf
+
+def to_day(value):
+    """Day number of a date, datetime, np.datetime64, string or day number"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.toordinal() - EPOCH_ORDINAL
+    if isinstance(value, np.datetime64):
+        return int(value.astype("datetime64[D]").astype(np.int64))
+    if isinstance(value, str):
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        return day
+    return int(value)
+
+
+class ProbabilityTable:
+    """Probability that the next date is on a given day (pmf) and by that day (cdf)
+    pmf[k] = probability for last date + k days
+    """
+    def __init__(self, last_day, pmf):
+        self.last_day = last_day
+        self.pmf = np.asarray(pmf, dtype=float)
+        self.cdf = np.cumsum(self.pmf)
+
+    def __len__(self):
+        return len(self.pmf)
+
+    def probability(self, day):
+        """Probability that the next date is exactly on day"""
+        k = to_day(day) - self.last_day
+        if 0 <= k < len(self.pmf):
+            return float(self.pmf[k])
+        return 0.0
+
+    def cumulative(self, day):
+        """Probability that the next date is on day or before"""
+        k = to_day(day) - self.last_day
+        if k < 0:
+            return 0.0
+        return float(self.cdf[min(k, len(self.cdf) - 1)])
+
+    def to_frame(self):
+        """DataFrame with date, day (days after the last date), probability and cumulative"""
+        days = np.arange(len(self.pmf))
+        return pd.DataFrame({
+            'date': (self.last_day + days).astype("datetime64[D]").astype("datetime64[ns]"),
+            'day': days,
+            'probability': self.pmf,
+            'cumulative': self.cdf,
+        })
+
+
+def probability_batch(days, offsets, horizon=60, bandwidth=0.0,
+        n_window=36, n_recent=12, gap_max=35):
+    """Probability tables for all users (days/offsets as in batch.py)
+    Returns (last days, pmf array users x horizon + 1); rows are zero for users
+    without a prediction (less than 3 recent clean deltas)
+    """
+    days = np.asarray(days, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    values, starts, counts = recent_deltas(days, offsets, n_window, n_recent, gap_max)
+    pmf = delta_pmf(values, counts, horizon, bandwidth)
+    pmf[counts < 3] = 0
+    return last_days(days, offsets), pmf
+
+def export_batch(days, offsets, names=None, **kwargs):
+    """Long table for export: user, date, day, probability, cumulative (users with a prediction only)"""
+    last, pmf = probability_batch(days, offsets, **kwargs)
+    users = np.flatnonzero(pmf.sum(axis=1) > 0)
+    k = np.arange(pmf.shape[1])
+    user = np.repeat(users, len(k))
+    return pd.DataFrame({
+        'user': user if names is None else np.asarray(names)[user],
+        'date': (last[user] + np.tile(k, len(users))).astype("datetime64[D]").astype("datetime64[ns]"),
+        'day': np.tile(k, len(users)),
+        'probability': pmf[users].ravel(),
+        'cumulative': np.cumsum(pmf[users], axis=1).ravel(),
+    })
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from file_utils import atomic_write
+
+# Cache of rendered plots, keyed by a hash of the render inputs
+# (data, statistics, style, size). Identical inputs = identical image, so a
+# repeated render is a dictionary lookup. Bounded LRU in memory, optionally
+# backed by a directory of files so other processes/restarts can use it too.
+
+# Bump when the plotting code changes, so old images on disk are not used
+RENDER_VERSION = 2
+
+def render_key(inputs):
+    """sha256 of render inputs (dict of scalars, lists, dicts and NumPy arrays)"""
+    digest = hashlib.sha256(f"v{RENDER_VERSION}".encode())
+    _update(digest, inputs)
+    return digest.hexdigest()
+
+def _update(digest, value):
+    if isinstance(value, dict):
+        for name in sorted(value):
+            digest.update(f"<{name}>".encode())
+            _update(digest, value[name])
+    elif isinstance(value, np.ndarray):
+        digest.update(f"array{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+class RenderCache:
+    """LRU cache of rendered images (base64 strings)
+    max_items: number of images kept in memory
+    directory: optional on-disk tier (one file per image)
+    """
+    def __init__(self, max_items=64, directory=None):
+        self.max_items = max_items
+        self.directory = directory
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".b64")
+
+    def get(self, key):
+        """Cached image or None"""
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+        if self.directory is not None:
+            try:
+                with open(self._path(key)) as f:
+                    image = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                self._remember(key, image)
+                with self.lock:
+                    self.hits += 1
+                return image
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, image):
+        self._remember(key, image)
+        if self.directory is not None:
+            atomic_write(self._path(key), image)
+
+    def _remember(self, key, image):
+        with self.lock:
+            self.items[key] = image
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+    def render(self, inputs, renderer):
+        """Image for inputs, renderer(inputs) is only called on a cache miss"""
+        key = render_key(inputs)
+        image = self.get(key)
+        if image is None:
+            image = renderer(inputs)
+            if image is not None:
+                self.put(key, image)
+        return image
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+# One cache for all trackers in the process: sessions showing the same state share images
+shared_cache = RenderCache()
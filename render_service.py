@@ -0,0 +1,74 @@
+import itertools
+import threading
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from render_cache import render_key, shared_cache
+
+# Plot rendering in a process pool
+# Only the render inputs (a few dozen numbers, see CycleTracker.render_inputs)
+# are sent to a worker, the base64 image comes back as a Future. Every worker
+# process has its own pyplot, so sessions render in parallel on all cores.
+# The same inputs requested again while rendering get the same Future, and
+# finished images go to the render cache.
+
+def render_payload(inputs):
+    """Worker side: render with the renderer named in the inputs"""
+    from cycle_tracker import RENDERERS
+    return RENDERERS[inputs['renderer']](inputs)
+
+
+class RenderService:
+    """Render plots in background processes
+    executor: any concurrent.futures executor (default: ProcessPoolExecutor(max_workers, mp_context))
+    cache: RenderCache for finished images (default: the shared one)
+    render: function of the render inputs run in the executor
+    """
+    def __init__(self, max_workers=None, executor=None, cache=None, render=render_payload, mp_context=None):
+        self.executor = executor if executor is not None else ProcessPoolExecutor(max_workers, mp_context)
+        self.cache = cache if cache is not None else shared_cache
+        self.render = render
+        self.lock = threading.Lock()
+        self.in_flight = {}                         # key -> Future
+        self.last = weakref.WeakKeyDictionary()     # owner -> {kind: (request number, last finished image)}
+        self.requests = itertools.count()
+
+    def submit(self, inputs):
+        """Future of the image for the render inputs (already done on a cache hit)"""
+        key = render_key(inputs)
+        image = self.cache.get(key)
+        if image is not None:
+            future = Future()
+            future.set_result(image)
+            return future
+        with self.lock:
+            if key in self.in_flight:
+                return self.in_flight[key]
+            future = self.executor.submit(self.render, inputs)
+            self.in_flight[key] = future
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return future
+
+    def _finished(self, key, future):
+        with self.lock:
+            self.in_flight.pop(key, None)
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            self.cache.put(key, future.result())
+
+    def request(self, owner, kind, inputs):
+        """Image to show now + Future of the up-to-date one
+        While the new image is rendering, the last one finished for (owner, kind) is returned
+        (None if there was none); owner is any object, e.g. the session's tracker
+        """
+        future = self.submit(inputs)
+        number = next(self.requests)
+        images = self.last.setdefault(owner, {})
+
+        def remember(f):
+            # An older request finishing late must not replace a newer image
+            if not f.cancelled() and f.exception() is None and images.get(kind, (-1, None))[0] < number:
+                images[kind] = (number, f.result())
+        future.add_done_callback(remember)    # runs right away if the future is done
+        return images.get(kind, (None, None))[1], future
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from journal import DateJournal, ADD, DELETE
+from binary_store import BinaryDateStore, to_days, to_iso
+from file_utils import FileLock, file_generation
+
+# Storage backends for CycleTracker
+# Every backend has the same methods:
+#   load() -> sorted DataFrame with one 'date' column
+#   load_days() -> optional, sorted unique day numbers (backends storing dates as numbers)
+#   save(records) -> store list of (op, date) changes, op is ADD or DELETE
+#   locked() -> context manager, holds the lock shared with other processes
+#   generation() -> value that changes whenever the stored data change
+#   read_changes() -> records stored by others since our last load/save (None = full load needed)
+#   source -> path of the file the dates are stored in (for messages and the file watcher)
+
+class CsvStorage:
+    """One CSV file per user + append-only journal of changes"""
+    def __init__(self, csv_file='dates.csv', max_journal_bytes=64 * 1024):
+        self.csv_file = csv_file
+        self.source = csv_file
+        self.journal = DateJournal(csv_file, max_bytes=max_journal_bytes)
+
+    def load(self):
+        return self.journal.load()
+
+    def locked(self):
+        return self.journal.lock
+
+    def generation(self):
+        return self.journal.generation()
+
+    def read_changes(self):
+        return self.journal.read_changes()
+
+    def save(self, records):
+        self.journal.append_many(records)
+        if self.journal.needs_compaction():
+            self.journal.compact()
+
+
+class BinaryStorage:
+    """Memory-mapped binary file with int32 day numbers (see binary_store.py)
+    Dates are returned in 'YYYY-MM-DD' format
+    """
+    def __init__(self, path):
+        self.store = BinaryDateStore(path)
+        self.source = path
+        self.lock = FileLock(f"{path}.lock")
+
+    def locked(self):
+        return self.lock
+
+    def generation(self):
+        return file_generation(self.store.path)
+
+    def read_changes(self):
+        # The binary file is rewritten, not appended to -> always full load
+        return None
+
+    def load(self):
+        self.store.reload()
+        if len(self.store) == 0:
+            return pd.DataFrame(columns=['date'])
+        return pd.DataFrame({'date': to_iso(self.store.days)})
+
+    def load_days(self):
+        """Day numbers straight from the memory-mapped file, no strings"""
+        self.store.reload()
+        return self.store.days
+
+    def save(self, records):
+        if len(records) == 0:
+            return
+        days = to_days([date_str for _, date_str in records])
+        with self.lock:
+            self.store.reload()
+            old = np.array(self.store.days)
+            new = old
+            # Apply the records in order, one set operation per run of the same op
+            start = 0
+            for end in range(1, len(records) + 1):
+                if end < len(records) and records[end][0] == records[start][0]:
+                    continue
+                if records[start][0] == ADD:
+                    new = np.union1d(new, days[start:end])
+                elif records[start][0] == DELETE:
+                    new = np.setdiff1d(new, days[start:end])
+                start = end
+            # One write: append if only later days were added, else rewrite the file
+            if len(new) > len(old) and (new[:len(old)] == old).all():
+                self.store.extend(new[len(old):])
+            elif len(new) != len(old) or (new != old).any():
+                self.store.write(new)
+
+
+class SqliteStorage:
+    """Dates of many users in one SQLite database
+
+    Rows are kept in a table indexed by (user_id, date), so loading one user
+    is an index range scan and every change is a single-row transaction.
+    All storages pointing to the same database file share one connection.
+    """
+    _connections = {}
+    _connections_lock = threading.Lock()
+
+    def __init__(self, db_file, user_id):
+        self.db_file = db_file
+        self.source = db_file
+        self.user_id = str(user_id)
+        self.conn, self.lock = self._connect(db_file)
+
+    @classmethod
+    def _connect(cls, db_file):
+        """Open (or reuse) connection to the database, create table if needed"""
+        key = os.path.abspath(db_file)
+        with cls._connections_lock:
+            if key not in cls._connections:
+                directory = os.path.dirname(key)
+                os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(key, check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS dates (
+                        user_id TEXT NOT NULL,
+                        date TEXT NOT NULL,
+                        PRIMARY KEY (user_id, date)
+                    ) WITHOUT ROWID""")
+                # Change counter per user, increased by every save (PRAGMA data_version
+                # can't be used: it ignores commits made on the same, shared connection)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS versions (
+                        user_id TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL
+                    )""")
+                cls._connections[key] = (conn, threading.Lock())
+            return cls._connections[key]
+
+    @classmethod
+    def close_all(cls):
+        """Close all shared connections"""
+        with cls._connections_lock:
+            for conn, _ in cls._connections.values():
+                conn.close()
+            cls._connections.clear()
+
+    def locked(self):
+        # SQLite does its own locking, every save is a transaction
+        return nullcontext()
+
+    def generation(self):
+        """Change counter of this user, increased by every save (from any connection or storage)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT version FROM versions WHERE user_id = ?", (self.user_id,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def read_changes(self):
+        # No change log in the database -> full load of the user's rows
+        return None
+
+    def load(self, start=None, end=None):
+        """Load dates of this user, optionally only start <= date <= end"""
+        query = "SELECT date FROM dates WHERE user_id = ?"
+        params = [self.user_id]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(end)
+        query += " ORDER BY date"
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        if len(rows) == 0:
+            return pd.DataFrame(columns=['date'])
+        return pd.DataFrame({'date': [row[0] for row in rows]})
+
+    def save(self, records):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for op, date_str in records:
+                    if op == ADD:
+                        self.conn.execute(
+                            "INSERT OR IGNORE INTO dates (user_id, date) VALUES (?, ?)",
+                            (self.user_id, date_str))
+                    elif op == DELETE:
+                        self.conn.execute(
+                            "DELETE FROM dates WHERE user_id = ? AND date = ?",
+                            (self.user_id, date_str))
+                self.conn.execute(
+                    "INSERT INTO versions (user_id, version) VALUES (?, 1) "
+                    "ON CONFLICT(user_id) DO UPDATE SET version = version + 1",
+                    (self.user_id,))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
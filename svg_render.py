@@ -0,0 +1,97 @@
+import base64
+import math
+from html import escape
+import numpy as np
+from plots import donut, pred_text
+
+# SVG versions of the plots in plots.py, written directly as text
+# Same render inputs, colors and line widths; sizes are in points (figure inches * 72),
+# so lw and font sizes mean the same as in matplotlib. Vector output stays sharp on any screen.
+
+FONT = 'font-family="DejaVu Sans, Arial, sans-serif"'
+
+def _svg(width, height, body):
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:g}pt" height="{height:g}pt" '
+        f'viewBox="0 0 {width:g} {height:g}">{body}</svg>')
+
+def pred_svg(inputs):
+    """Prediction donut as SVG text"""
+    style = inputs['style']
+    width, height = inputs['size'][0] * 72, inputs['size'][1] * 72
+    cx, cy = width / 2, height / 2
+    radius = 0.45 * min(width, height)
+    parts = donut(inputs['delta_med'], inputs['time_med'])
+    total = sum(parts)
+    fraction = min(max(parts[0] / total, 0), 1) if total > 0 else 0
+    stroke = f'stroke="{style["c_outline"]}" stroke-width="{style["lw"]:g}"'
+
+    # Ring part from 12 o'clock clockwise (startangle=90, counterclock=False)
+    shapes = [f'<circle cx="{cx:g}" cy="{cy:g}" r="{radius:g}" fill="white" {stroke}/>']
+    if fraction >= 1:
+        shapes.append(f'<circle cx="{cx:g}" cy="{cy:g}" r="{radius:g}" fill="{style["c_ring"]}" {stroke}/>')
+    elif fraction > 0:
+        angle = 2 * math.pi * fraction
+        x, y = cx + radius * math.sin(angle), cy - radius * math.cos(angle)
+        large = 1 if fraction > 0.5 else 0
+        shapes.append(f'<path d="M{cx:g},{cy:g} L{cx:g},{cy - radius:g} '
+            f'A{radius:g},{radius:g} 0 {large} 1 {x:.2f},{y:.2f} Z" fill="{style["c_ring"]}" {stroke}/>')
+    shapes.append(f'<circle cx="{cx:g}" cy="{cy:g}" r="{0.7 * radius:g}" fill="white" {stroke}/>')
+
+    # Text centered on the middle, one tspan per line
+    lines = pred_text(inputs['time_2575']).split("\n")
+    first = -(len(lines) - 1) * 0.6
+    spans = "".join(
+        f'<tspan x="{cx:g}" dy="{(first if i == 0 else 1.2):g}em">{escape(line)}</tspan>'
+        for i, line in enumerate(lines))
+    shapes.append(f'<text x="{cx:g}" y="{cy:g}" text-anchor="middle" dominant-baseline="central" '
+        f'font-size="20" font-weight="bold" {FONT}>{spans}</text>')
+    return _svg(width, height, "".join(shapes))
+
+def raw_svg(inputs, y_min=15, y_max=35):
+    """Cycle lengths over time as SVG text"""
+    style = inputs['style']
+    width, height = inputs['size'][0] * 72, inputs['size'][1] * 72
+    left, right, top, bottom = 48, 12, 24, 36
+    plot_w, plot_h = width - left - right, height - top - bottom
+    days = inputs['date'].astype(np.int64)
+    delta = inputs['delta_clean']
+    lo, hi = (days.min(), days.max()) if len(days) > 0 else (0, 1)
+    if hi == lo:
+        lo, hi = lo - 1, hi + 1
+    xs = left + (days - lo) / (hi - lo) * plot_w
+    ys = top + (y_max - delta) / (y_max - y_min) * plot_h
+
+    parts = [f'<rect x="{left}" y="{top}" width="{plot_w:g}" height="{plot_h:g}" fill="none" stroke="black" stroke-width="0.8"/>',
+        f'<clipPath id="area"><rect x="{left}" y="{top}" width="{plot_w:g}" height="{plot_h:g}"/></clipPath>']
+    # Axes, ticks and labels
+    for value in range(y_min, y_max + 1, 5):
+        y = top + (y_max - value) / (y_max - y_min) * plot_h
+        parts.append(f'<text x="{left - 4}" y="{y:.1f}" text-anchor="end" dominant-baseline="central" font-size="8" {FONT}>{value}</text>')
+    for tick in np.linspace(lo, hi, 5).round().astype(np.int64) if len(days) > 0 else []:
+        x = left + (tick - lo) / (hi - lo) * plot_w
+        label = str(np.datetime64(int(tick), "D"))[:7]
+        parts.append(f'<text x="{x:.1f}" y="{top + plot_h + 12:g}" text-anchor="middle" font-size="8" {FONT}>{label}</text>')
+    parts.append(f'<text x="{left + plot_w / 2:g}" y="{height - 6:g}" text-anchor="middle" font-size="9" {FONT}>Date</text>')
+    parts.append(f'<text transform="translate(12,{top + plot_h / 2:g}) rotate(-90)" text-anchor="middle" font-size="9" {FONT}>Cycle Length (days)</text>')
+    parts.append(f'<text x="{left + plot_w / 2:g}" y="{top - 8}" text-anchor="middle" font-size="10" {FONT}>Your data</text>')
+
+    # One dotted path, NaN (gaps) start a new subpath so the line is interrupted
+    valid = ~np.isnan(delta)
+    path = []
+    for i in range(len(delta)):
+        if valid[i]:
+            path.append(f'{"L" if i > 0 and valid[i - 1] else "M"}{xs[i]:.1f},{ys[i]:.1f}')
+    parts.append('<g clip-path="url(#area)">')
+    if path:
+        parts.append(f'<path d="{" ".join(path)}" fill="none" stroke="{style["c_ring"]}" '
+            f'stroke-width="1.5" stroke-dasharray="1.5,2.5"/>')
+    parts.extend(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="{style["c_main"]}"/>'
+        for x, y in zip(xs[valid], ys[valid]))
+    parts.append('</g>')
+    return _svg(width, height, "".join(parts))
+
+SVG_RENDERERS = {'raw': raw_svg, 'pred': pred_svg}
+
+def render(inputs):
+    """SVG as base64 string (like plots.render, for Image src_base64)"""
+    return base64.b64encode(SVG_RENDERERS[inputs['kind']](inputs).encode()).decode()
@@ -0,0 +1,100 @@
+import csv
+import glob
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from backtest import backtest, summarize
+from batch import ragged
+from date_parser import parse_file
+
+# Parameter sweep for the prediction
+# Every parameter combination is backtested over a corpus of users' histories
+# in a process pool; results are written to CSV as they come and ranked by error.
+# The best parameters can be passed to CycleTracker(...) directly.
+
+PARAMS = ['n_window', 'n_recent', 'gap_max', 'q_low', 'q_high']
+# All configurations are scored on the same cycles (longer ones are gaps in the records)
+MAX_CYCLE = 35
+
+def load_corpus(paths):
+    """Load histories from CSV files (list of paths or a glob pattern like 'users/*.csv')
+    Returns (days, offsets, names)
+    """
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths))
+    histories = [parse_file(path).days for path in paths]
+    days, offsets = ragged(histories)
+    names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    return days, offsets, names
+
+def param_grid(n_window=(24, 36, 48), n_recent=(6, 9, 12, 18), gap_max=(35, 40, 45),
+        quantiles=((0.25, 0.75), (0.2, 0.8))):
+    """All combinations of the given values as list of dicts"""
+    return [
+        {'n_window': w, 'n_recent': r, 'gap_max': g, 'q_low': lo, 'q_high': hi}
+        for w, r, g, (lo, hi) in itertools.product(n_window, n_recent, gap_max, quantiles)
+        if r < w
+    ]
+
+# The corpus is sent to every worker once (initializer), not with every task
+_corpus = None
+
+def _init_worker(days, offsets):
+    global _corpus
+    _corpus = (days, offsets)
+
+def _evaluate(params):
+    days, offsets = _corpus
+    summary = summarize(backtest(days, offsets, **params), max_cycle=MAX_CYCLE)
+    return {**params, **summary.to_dict()}
+
+def sweep(days, offsets, grid=None, out_file=None, max_workers=None):
+    """Backtest every parameter combination, returns results ranked by mean absolute error
+    out_file: CSV file, every result is appended as soon as it is ready
+    max_workers: number of processes (0 = run in this process)
+    """
+    if grid is None:
+        grid = param_grid()
+    columns = PARAMS + ['n', 'mae', 'bias', 'coverage']
+    results = []
+    out = open(out_file, "w", newline="") if out_file is not None else None
+    try:
+        writer = csv.DictWriter(out, fieldnames=columns) if out is not None else None
+        if writer is not None:
+            writer.writeheader()
+
+        def collect(result):
+            results.append(result)
+            if writer is not None:
+                writer.writerow(result)
+                out.flush()
+
+        if max_workers == 0:
+            _init_worker(days, offsets)
+            for params in grid:
+                collect(_evaluate(params))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                    initargs=(days, offsets)) as pool:
+                for future in as_completed([pool.submit(_evaluate, params) for params in grid]):
+                    collect(future.result())
+    finally:
+        if out is not None:
+            out.close()
+
+    ranked = pd.DataFrame(results, columns=columns)
+    # Ties are ordered by the parameters, so the ranking doesn't depend on which worker finished first
+    return ranked.sort_values(['mae', 'n'] + PARAMS,
+        ascending=[True, False] + [True] * len(PARAMS)).reset_index(drop=True)
+
+def best_params(ranked):
+    """Parameters of the best configuration, as keyword arguments for CycleTracker"""
+    best = ranked.iloc[0]
+    return {
+        'n_window': int(best['n_window']),
+        'n_recent': int(best['n_recent']),
+        'gap_max': int(best['gap_max']),
+        'q_low': float(best['q_low']),
+        'q_high': float(best['q_high']),
+    }
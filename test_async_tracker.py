@@ -0,0 +1,37 @@
+import asyncio
+from async_tracker import AsyncCycleTracker
+from cycle_tracker import CycleTracker
+
+class TestAsyncCycleTracker:
+    def test_concurrent_mutations(self, tmp_path):
+        """Test that concurrent adds/deletes on one tracker are all applied"""
+        tracker = AsyncCycleTracker(CycleTracker(csv_file=str(tmp_path / "dates.csv")))
+        days = [f"2024-{month:02d}-01" for month in range(1, 13)]
+
+        async def run():
+            added = await asyncio.gather(*(tracker.add_date(d) for d in days + days[:3]))
+            deleted = await asyncio.gather(tracker.delete_date(days[0]), tracker.delete_date(days[0]))
+            return added, deleted
+
+        added, deleted = asyncio.run(run())
+        assert sum(added) == 12
+        assert sorted(deleted) == [False, True]
+        assert tracker.dates['date'].tolist() == days[1:]
+        assert CycleTracker(csv_file=str(tmp_path / "dates.csv")).dates['date'].tolist() == days[1:]
+
+    def test_plot(self, tmp_path):
+        """Test rendering in the executor"""
+        tracker = AsyncCycleTracker(CycleTracker(csv_file=str(tmp_path / "dates.csv")))
+        asyncio.run(tracker.add_dates(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25"]))
+        assert isinstance(asyncio.run(tracker.plot_raw()), str)
+
+    def test_snapshot(self, tmp_path):
+        """Test view data read under the lock"""
+        tracker = AsyncCycleTracker(CycleTracker(csv_file=str(tmp_path / "dates.csv")))
+        asyncio.run(tracker.add_dates(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25"]))
+        view = asyncio.run(tracker.snapshot())
+        assert view['dates'] == ["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25"]
+        assert view['pred_date'] == "2024-04-22"
+        assert view['today'] == tracker.clock()
+        table = asyncio.run(tracker.probability_table(horizon=40))
+        assert table is tracker.tracker.probability_table(horizon=40)
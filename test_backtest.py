@@ -0,0 +1,32 @@
+import numpy as np
+from backtest import backtest, summarize
+from batch import predict_batch, ragged
+
+class TestBacktest:
+    def test_matches_prefix_predictions(self):
+        """Test each origin against a batch prediction from the history known at that date"""
+        rng = np.random.default_rng(3)
+        histories = []
+        for n in [2, 6, 30, 70]:
+            steps = rng.choice([22, 26, 28, 29, 31, 34, 40, 75], size=n)
+            histories.append(19000 + np.cumsum(steps))
+        days, offsets = ragged(histories)
+        result = backtest(days, offsets)
+
+        prefixes = [h[:i + 1] for h in histories for i in range(len(h) - 1)]
+        users = [u for u, h in enumerate(histories) for _ in range(len(h) - 1)]
+        expected = predict_batch(*ragged(prefixes))
+        has_pred = ~np.isnat(expected["pred50"])
+        assert len(result) == has_pred.sum()
+        assert (result['user'].values == np.array(users)[has_pred]).all()
+        assert (result['pred50'].values.astype("datetime64[D]") == expected["pred50"][has_pred]).all()
+        assert (result['pred_low'].values.astype("datetime64[D]") == expected["pred25"][has_pred]).all()
+        assert (result['pred_high'].values.astype("datetime64[D]") == expected["pred75"][has_pred]).all()
+
+    def test_summary(self):
+        """Test perfectly regular cycles are predicted without error"""
+        days, offsets = ragged([19000 + 28 * np.arange(20)])
+        summary = summarize(backtest(days, offsets))
+        assert summary['n'] == 16
+        assert summary['mae'] == 0
+        assert summary['coverage'] == 1
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from batch import predict_batch, ragged
+from cycle_tracker import CycleTracker
+
+class TestPredictBatch:
+    def test_matches_tracker(self, tmp_path):
+        """Test batch results against one CycleTracker per user"""
+        rng = np.random.default_rng(2)
+        histories = [[], ["2024-01-01"], ["2024-01-01", "2024-01-29", "2024-02-26"]]
+        for n in [5, 14, 40, 80]:
+            steps = rng.choice([21, 26, 28, 29, 30, 33, 36, 50, 90], size=n)
+            histories.append(list((19000 + np.cumsum(steps)).astype("datetime64[D]").astype(str)))
+
+        days, offsets = ragged(histories)
+        result = predict_batch(days, offsets)
+        for u, history in enumerate(histories):
+            tracker = CycleTracker(csv_file=str(tmp_path / f"user{u}.csv"))
+            tracker.add_dates(history)
+            assert result["n_dates"][u] == len(history)
+            if tracker.pred50 is None:
+                assert np.isnat(result["pred50"][u])
+                assert np.isnan(result["time_med"][u])
+                continue
+            assert result["delta_50"][u] == tracker.delta_med / pd.Timedelta(days=1)
+            assert result["delta_25"][u] == tracker.delta_25 / pd.Timedelta(days=1)
+            assert result["delta_75"][u] == tracker.delta_75 / pd.Timedelta(days=1)
+            assert result["pred50"][u] == np.datetime64(tracker.pred50)
+            assert result["pred25"][u] == np.datetime64(tracker.pred25)
+            assert result["pred75"][u] == np.datetime64(tracker.pred75)
+            assert result["time_med"][u] == tracker.time_med
+            assert set([result["time_25"][u], result["time_75"][u]]) == set(tracker.time_2575)
+            assert result["n_recent"][u] == len(tracker.recent)
+
+    def test_parameters_match_tracker(self, tmp_path):
+        """Test non-default window/gap/quantile parameters in batch and tracker"""
+        rng = np.random.default_rng(5)
+        history = list((19000 + np.cumsum(rng.choice([24, 28, 31, 38, 42, 70], size=50)))
+            .astype("datetime64[D]").astype(str))
+        params = dict(n_window=12, n_recent=5, gap_max=40)
+        result = predict_batch(*ragged([history]), qs=(0.2, 0.5, 0.8), **params)
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"), q_low=0.2, q_high=0.8, **params)
+        tracker.add_dates(history[:-1])
+        tracker.df
+        tracker.add_date(history[-1])      # incremental update
+        assert result["pred20"][0] == np.datetime64(tracker.pred25)
+        assert result["pred50"][0] == np.datetime64(tracker.pred50)
+        assert result["pred80"][0] == np.datetime64(tracker.pred75)
+        assert len(tracker.df) == 12
+
+    def test_non_dyadic_quantiles(self):
+        """Test quantiles like 0.8 against pandas (bad rounding would lose a day)"""
+        days = 19000 + np.cumsum([0, 20, 21, 23, 23, 24, 26, 28, 28, 33, 33])
+        result = predict_batch(*ragged([days]), qs=(0.2, 0.5, 0.8))
+        deltas = pd.Series(np.diff(days)[-12:].astype(float))
+        assert result["delta_80"][0] == deltas.quantile(0.8) == 29.0
+        assert result["pred80"][0] == np.datetime64(int(days[-1]) + 29, "D")
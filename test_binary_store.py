@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from binary_store import BinaryDateStore, to_days
+from cycle_tracker import CycleTracker
+from journal import ADD, DELETE
+from storage import BinaryStorage
+
+class TestBinaryDateStore:
+    def test_csv_roundtrip(self, tmp_path):
+        """Test import from CSV (dd.mm.YYYY with header) and export back"""
+        store = BinaryDateStore.from_csv("data/testdata.csv", str(tmp_path / "dates.bin"))
+        expected = pd.to_datetime(pd.read_csv("data/testdata.csv")['date'], format="%d.%m.%Y")
+        assert len(store) == len(expected)
+        assert (store.dates() == expected.values.astype("datetime64[D]")).all()
+        assert (store.deltas() == np.diff(store.days)).all()
+
+        store.to_csv(str(tmp_path / "export.csv"))
+        again = BinaryDateStore.from_csv(str(tmp_path / "export.csv"), str(tmp_path / "again.bin"))
+        assert (again.days == store.days).all()
+
+    def test_add_delete(self, tmp_path):
+        """Test that the file stays sorted and unique"""
+        store = BinaryDateStore(str(tmp_path / "dates.bin"))
+        day1, day2, day3 = to_days(["2024-01-01", "2024-02-01", "2024-03-01"])
+        assert store.add(day3)
+        assert store.add(day1)
+        assert store.add(day2)
+        assert not store.add(day2)
+        assert store.days.tolist() == [day1, day2, day3]
+        assert store.delete(day2)
+        assert not store.delete(day2)
+        assert store.days.tolist() == [day1, day3]
+
+    def test_tracker_backend(self, tmp_path):
+        """Test CycleTracker with binary storage"""
+        path = str(tmp_path / "dates.bin")
+        tracker = CycleTracker(storage=BinaryStorage(path))
+        tracker.add_dates(["2024-02-01", "2024-01-01"])
+        tracker.delete_date("2024-02-01")
+        assert CycleTracker(storage=BinaryStorage(path)).dates['date'].tolist() == ["2024-01-01"]
+
+    def test_tracker_loads_day_numbers(self, tmp_path):
+        """Test that the tracker builds its index from the day numbers without making strings"""
+        path = str(tmp_path / "dates.bin")
+        BinaryDateStore(path).write(to_days(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25"]))
+        tracker = CycleTracker(storage=BinaryStorage(path))
+        assert tracker.pred_date == "2024-04-22"
+        assert tracker.index._values is None
+        other = CycleTracker(storage=BinaryStorage(path))
+        other.add_date("2024-04-20")
+        assert tracker.reload_if_changed() == True
+        assert tracker.dates['date'].tolist()[-1] == "2024-04-20"
+
+    def test_save_writes_once(self, tmp_path, monkeypatch):
+        """Test that a bulk save writes the file once (append if all dates are later)"""
+        storage = BinaryStorage(str(tmp_path / "dates.bin"))
+        storage.store.write(to_days(["2030-01-01"]))
+        writes = []
+        for name in ["write", "extend"]:
+            method = getattr(storage.store, name)
+            monkeypatch.setattr(storage.store, name,
+                lambda days, name=name, method=method: writes.append(name) or method(days))
+        rng = np.random.default_rng(3)
+        days = rng.permutation(19000 + 28 * np.arange(50))
+        tracker = CycleTracker(storage=storage)
+        tracker.add_dates([str(d) for d in days.astype("datetime64[D]")])
+        assert writes == ["write"]
+        assert storage.load_days().tolist() == sorted(days.tolist()) + to_days(["2030-01-01"]).tolist()
+
+        writes.clear()
+        storage.save([(ADD, "2030-02-01"), (ADD, "2030-03-01")])
+        assert writes == ["extend"]
+        storage.save([(ADD, "2030-04-01"), (DELETE, "2030-04-01"), (DELETE, "2030-03-01"), (ADD, "2030-03-01")])
+        assert writes == ["extend"]     # nothing changed
+        storage.save([(DELETE, "2030-03-01"), (ADD, "2029-12-01")])
+        assert writes == ["extend", "write"]
+        assert storage.load_days()[-3:].tolist() == to_days(["2029-12-01", "2030-01-01", "2030-02-01"]).tolist()
@@ -0,0 +1,32 @@
+from datetime import date, datetime
+from cycle_tracker import CycleTracker
+from clock import DayScheduler, live_trackers, seconds_to_midnight
+
+class TestClock:
+    def test_day_rollover(self, tmp_path):
+        """Test that only the days remaining change at midnight, without recomputing the statistics"""
+        today = [date(2024, 4, 1)]
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"), clock=lambda: today[0])
+        tracker.add_dates(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25"])
+        assert tracker.pred_date == "2024-04-22"
+        assert tracker.time_med == 21
+        assert tracker in live_trackers
+
+        def fail():
+            raise AssertionError("statistics recomputed")
+        tracker.process_data = fail
+        refreshed = []
+        scheduler = DayScheduler([tracker], on_rollover=refreshed.extend)
+        assert scheduler.tick() == []       # same day, nothing to do
+        today[0] = date(2024, 4, 2)
+        assert scheduler.tick() == [tracker]
+        assert refreshed == [tracker]
+        assert tracker.time_med == 20
+        assert tracker.time_2575 == [20]
+
+        today[0] = date(2024, 4, 3)     # also without the scheduler
+        assert tracker.time_med == 19
+
+    def test_seconds_to_midnight(self):
+        assert seconds_to_midnight(datetime(2024, 4, 1, 23, 59, 30)) == 30
+        assert seconds_to_midnight(datetime(2024, 4, 1)) == 24 * 3600
@@ -1,7 +1,9 @@
 import pytest
 import os
+import numpy as np
 import pandas as pd
 from cycle_tracker import CycleTracker
+from storage import SqliteStorage
 
 # run pytest in your terminal
 # Pytest will:
@@ -39,4 +41,188 @@ class TestCycleTracker:
         temp_tracker.add_date("2024-01-01")
         result = temp_tracker.add_date("2024-01-01")
         assert result == False
-        assert len(temp_tracker.dates) == 1
\ No newline at end of file
+        assert len(temp_tracker.dates) == 1
+
+    def test_delete_date(self, temp_tracker):
+        """Test deleting a date"""
+        temp_tracker.add_date("2024-01-01")
+        assert temp_tracker.delete_date("2024-01-01") == True
+        assert temp_tracker.delete_date("2024-01-01") == False
+        assert len(temp_tracker.dates) == 0
+
+    def test_reload_replays_journal(self, temp_tracker):
+        """Test that a new tracker sees the same dates as the one that made the changes"""
+        for date_str in ["2024-03-01", "2024-01-01", "2024-02-01"]:
+            temp_tracker.add_date(date_str)
+        temp_tracker.delete_date("2024-02-01")
+        reloaded = CycleTracker(csv_file=temp_tracker.csv_file)
+        pd.testing.assert_frame_equal(reloaded.dates, temp_tracker.dates)
+
+    def test_journal_compaction(self, temp_tracker):
+        """Test that the journal is merged into the base file once it is too big"""
+        journal = temp_tracker.storage.journal
+        journal.max_bytes = 0
+        temp_tracker.add_date("2024-01-01")
+        temp_tracker.add_date("2024-02-01")
+        assert not os.path.exists(journal.path)
+        base = pd.read_csv(temp_tracker.csv_file, header=None, names=['date'])
+        pd.testing.assert_frame_equal(base, temp_tracker.dates)
+
+    def test_add_dates(self, temp_tracker):
+        """Test bulk adding with a report for each row"""
+        temp_tracker.add_date("2024-01-01")
+        report = temp_tracker.add_dates(["2024-02-01", "2024-01-01", "not a date", "2024-02-01"])
+        assert report['status'].tolist() == ["added", "duplicate", "invalid", "duplicate"]
+        assert temp_tracker.dates['date'].tolist() == ["2024-01-01", "2024-02-01"]
+
+    def test_add_dates_from_file(self, temp_tracker):
+        """Test bulk adding from a file with header"""
+        report = temp_tracker.add_dates("data/periods.csv")
+        assert (report['status'] == "added").all()
+        reloaded = CycleTracker(csv_file=temp_tracker.csv_file)
+        pd.testing.assert_frame_equal(reloaded.dates, temp_tracker.dates)
+
+    def test_sqlite_storage(self, tmp_path):
+        """Test that users sharing one SQLite database only see their own dates"""
+        db_file = str(tmp_path / "trackers.db")
+        anna = CycleTracker(storage=SqliteStorage(db_file, "anna"))
+        bob = CycleTracker(storage=SqliteStorage(db_file, "bob"))
+        anna.add_dates(["2024-02-01", "2024-01-01"])
+        bob.add_date("2024-03-01")
+        anna.delete_date("2024-02-01")
+        assert CycleTracker(storage=SqliteStorage(db_file, "anna")).dates['date'].tolist() == ["2024-01-01"]
+        assert CycleTracker(storage=SqliteStorage(db_file, "bob")).dates['date'].tolist() == ["2024-03-01"]
+        SqliteStorage.close_all()
+
+    def test_sqlite_same_process(self, tmp_path):
+        """Test two trackers of one user on the shared connection see each other's changes"""
+        db_file = str(tmp_path / "trackers.db")
+        first = CycleTracker(storage=SqliteStorage(db_file, "anna"))
+        second = CycleTracker(storage=SqliteStorage(db_file, "anna"))
+        other_user = CycleTracker(storage=SqliteStorage(db_file, "bob"))
+        first.add_date("2024-01-01")
+        assert other_user.reload_if_changed() == False
+        assert second.reload_if_changed() == True
+        assert second.add_date("2024-01-01") == False
+        second.add_date("2024-02-01")
+        assert first.reload_if_changed() == True
+        assert first.dates['date'].tolist() == ["2024-01-01", "2024-02-01"]
+        SqliteStorage.close_all()
+
+    def test_invalid_dates_source(self, tmp_path):
+        """Test that malformed rows from SQLite are reported with the database file, not dates.csv"""
+        db_file = str(tmp_path / "trackers.db")
+        storage = SqliteStorage(db_file, "anna")
+        storage.conn.execute("INSERT INTO dates (user_id, date) VALUES ('anna', '2024-13-01')")
+        tracker = CycleTracker(storage=storage)
+        with pytest.warns(UserWarning, match="trackers.db"):
+            tracker.df
+        SqliteStorage.close_all()
+
+    def test_shared_file(self, temp_tracker):
+        """Test two trackers sharing one file see each other's changes"""
+        other = CycleTracker(csv_file=temp_tracker.csv_file)
+        temp_tracker.add_date("2024-01-01")
+        assert other.add_date("2024-01-01") == False
+        other.add_date("2024-02-01")
+        assert temp_tracker.reload_if_changed() == True
+        assert temp_tracker.reload_if_changed() == False
+        assert temp_tracker.dates['date'].tolist() == ["2024-01-01", "2024-02-01"]
+
+    def test_invalid_dates_reported(self, tmp_path):
+        """Test that malformed dates from the file are not used but reported"""
+        csv_file = tmp_path / "dates.csv"
+        csv_file.write_text("2024-01-01\n2024-13-01\n")
+        tracker = CycleTracker(csv_file=str(csv_file))
+        assert tracker.add_date("2024-14-01") == False
+        with pytest.warns(UserWarning):
+            assert len(tracker.df) == 1
+        assert [text for _, text, _ in tracker.invalid_dates] == ["2024-13-01"]
+        assert tracker.delete_date("2024-13-01") == True
+        assert CycleTracker(csv_file=str(csv_file)).invalid_dates == []
+
+    def test_dates_in_different_formats(self, temp_tracker):
+        """Test that the same day in another format is a duplicate and dates are chronological"""
+        temp_tracker.add_dates(["12.01.2022", "2021-12-10"])
+        assert temp_tracker.add_date("2022-01-12") == False
+        assert temp_tracker.dates['date'].tolist() == ["2021-12-10", "12.01.2022"]
+        assert temp_tracker.delete_date("2022-01-12") == True
+        assert temp_tracker.dates['date'].tolist() == ["2021-12-10"]
+        assert CycleTracker(csv_file=temp_tracker.csv_file).dates['date'].tolist() == ["2021-12-10"]
+
+    def test_lazy_statistics(self, temp_tracker):
+        """Test that statistics are computed only when read, once per change"""
+        temp_tracker.add_dates(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25", "2024-04-22"])
+        assert temp_tracker._stats_version != temp_tracker.version
+        assert temp_tracker.delta_med == pd.Timedelta(days=28)
+        assert temp_tracker._stats_version == temp_tracker.version
+        temp_tracker.delete_date("2024-01-01")
+        assert temp_tracker._stats_version != temp_tracker.version
+        assert temp_tracker.delta_med == pd.Timedelta(days=28)
+        assert len(temp_tracker.df) == 4
+
+    def test_incremental_update_matches_full(self, temp_tracker):
+        """Test that appending with the O(1) update gives the same results as process_data"""
+        rng = np.random.default_rng(1)
+        days = np.cumsum(rng.choice([24, 27, 28, 29, 31, 45, 60], size=60)) + 19000
+        dates = [str(d) for d in days.astype("datetime64[D]")]
+        temp_tracker.add_dates(dates[:2])
+        for date_str in dates[2:]:
+            temp_tracker.df    # statistics are up to date -> next add is incremental
+            temp_tracker.add_date(date_str)
+            assert temp_tracker._frames_pending
+            incremental = {name: getattr(temp_tracker, name) for name in
+                ["pred50", "pred25", "pred75", "pred_date", "time_med", "time_2575",
+                 "delta_med", "delta_25", "delta_75", "df", "recent"]}
+            temp_tracker.process_data()
+            for name, value in incremental.items():
+                if isinstance(value, pd.DataFrame):
+                    pd.testing.assert_frame_equal(value, getattr(temp_tracker, name))
+                else:
+                    assert value == getattr(temp_tracker, name), name
+
+    def test_n_recent(self, tmp_path):
+        """Test configurable number of recent cycles, also for the incremental update"""
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"), n_recent=3)
+        tracker.add_dates(["2024-01-01", "2024-01-21", "2024-02-18", "2024-03-17", "2024-04-14"])
+        assert tracker.delta_med == pd.Timedelta(days=28)
+        tracker.add_date("2024-05-03")
+        assert len(tracker.recent) == 3
+        assert tracker.delta_25 == pd.Timedelta(days=23.5)
+
+    def test_numpy_backend_matches_pandas(self, tmp_path):
+        """Test that the NumPy core gives the same statistics as the pandas path"""
+        rng = np.random.default_rng(2)
+        days = np.cumsum(rng.choice([24, 27, 28, 29, 31, 45, 60], size=50)) + 19000
+        dates = [str(d) for d in days.astype("datetime64[D]")]
+        csv_file = str(tmp_path / "dates.csv")
+        CycleTracker(csv_file=csv_file).add_dates(dates)
+        names = ["pred50", "pred25", "pred75", "pred_date", "time_med", "time_2575",
+                 "delta_med", "delta_25", "delta_75", "df", "recent"]
+        for q_low, q_high in [(0.25, 0.75), (0.2, 0.8)]:
+            fast = CycleTracker(csv_file=csv_file, backend="numpy", q_low=q_low, q_high=q_high)
+            slow = CycleTracker(csv_file=csv_file, q_low=q_low, q_high=q_high)
+            for name in names:
+                value = getattr(fast, name)
+                if isinstance(value, pd.DataFrame):
+                    pd.testing.assert_frame_equal(value, getattr(slow, name))
+                else:
+                    assert value == getattr(slow, name), name
+        # Incremental update on top of the NumPy core
+        next_date = str(days[-1].astype("datetime64[D]") + 28)
+        fast.add_date(next_date)
+        slow.add_date(next_date)
+        assert fast.pred_date == slow.pred_date
+        assert fast.time_2575 == slow.time_2575
+
+    def test_numpy_backend_non_dyadic_quantile(self, tmp_path):
+        """Test q_high=0.8 on deltas where the 0.8 quantile is exactly 29 (bad rounding loses a day)"""
+        days = 19000 + np.cumsum([0, 20, 21, 23, 23, 24, 26, 28, 28, 33, 33])
+        dates = [str(d) for d in days.astype("datetime64[D]")]
+        csv_file = str(tmp_path / "dates.csv")
+        CycleTracker(csv_file=csv_file).add_dates(dates)
+        expected = (days[-1] + 29).astype("datetime64[D]").item()
+        for backend in ["pandas", "numpy"]:
+            tracker = CycleTracker(csv_file=csv_file, backend=backend, q_low=0.2, q_high=0.8)
+            assert tracker.delta_75 == pd.Timedelta(days=29), backend
+            assert tracker.pred75 == expected, backend
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from date_parser import parse_dates, parse_file
+
+class TestDateParser:
+    def test_detect_formats(self):
+        """Test ISO and dd.mm.YYYY files give the same dates as parsing with explicit format"""
+        iso = parse_file("data/periods.csv")
+        assert iso.fmt == "%Y-%m-%d"
+        expected = pd.to_datetime(pd.read_csv("data/periods.csv")['date'], format="%Y-%m-%d")
+        assert (iso.dates() == expected.values.astype("datetime64[D]")).all()
+
+        dotted = parse_file("data/testdata.csv")
+        assert dotted.fmt == "%d.%m.%Y"
+        expected = pd.to_datetime(pd.read_csv("data/testdata.csv")['date'], format="%d.%m.%Y")
+        assert (dotted.dates() == expected.values.astype("datetime64[D]")).all()
+
+    def test_malformed_rows_are_reported(self):
+        """Test that bad rows are reported and the rest is kept"""
+        result = parse_dates(["10.12.2021", "31.02.2022", "2022-01-12", "soon"])
+        assert result.rows.tolist() == [0, 2]
+        assert result.dates().tolist() == [np.datetime64("2021-12-10").item(), np.datetime64("2022-01-12").item()]
+        assert [(i, text) for i, text, _ in result.errors] == [(1, "31.02.2022"), (3, "soon")]
+
+    def test_long_values_are_not_truncated(self):
+        """Test that values longer than a date are reported, not cut to a valid date"""
+        for bad in ["2024-01-0199", "2024-01-01T10", "01.02.20245"]:
+            result = parse_dates(["2024-01-01", bad])
+            assert result.rows.tolist() == [0]
+            assert [text for _, text, _ in result.errors] == [bad]
+
+    def test_signed_years_are_reported(self):
+        """Test that the fast path rejects a sign in the year like the per-row parser"""
+        for good, bad in [("2024-01-01", "+024-01-01"), ("2024-01-01", "-024-01-01"),
+                          ("01.01.2024", "01.02.-024"), ("01.01.2024", "01.02.+024")]:
+            result = parse_dates([good, bad])
+            assert result.rows.tolist() == [0]
+            assert [text for _, text, _ in result.errors] == [bad]
@@ -0,0 +1,24 @@
+import threading
+import figure_pool
+from cycle_tracker import CycleTracker
+from render_cache import RenderCache
+
+class TestFigurePool:
+    def test_figure_pool(self, tmp_path):
+        """Test that figures are built once per thread and reused"""
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"), render_cache=RenderCache(),
+            renderer="figure_pool")
+        tracker.add_dates(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25"])
+        assert isinstance(tracker.plot_pred(), str)
+        assert isinstance(tracker.plot_raw(), str)
+        figure = figure_pool.pool.figure('pred', (8, 8))
+        tracker.add_date("2024-04-20")
+        tracker.plot_pred()
+        assert figure_pool.pool.figure('pred', (8, 8)) is figure
+        assert figure.wedges[0].theta2 == 90
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(figure_pool.pool.figure('pred', (8, 8))))
+        thread.start()
+        thread.join()
+        assert other[0] is not figure
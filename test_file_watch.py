@@ -0,0 +1,105 @@
+import os
+import time
+from cycle_tracker import CycleTracker
+from file_watch import TrackerWatcher
+from storage import BinaryStorage
+
+class TestTrackerWatcher:
+    def test_appended_tail(self, tmp_path):
+        """Test that lines appended to the file are picked up without a full load"""
+        csv_file = tmp_path / "dates.csv"
+        csv_file.write_text("2024-01-01\n")
+        tracker = CycleTracker(csv_file=str(csv_file))
+        changes = []
+        watcher = TrackerWatcher(tracker, on_change=changes.append)
+
+        with open(csv_file, "a") as f:
+            f.write("2024-01-29\n2024-02-26\n2024-03")     # last line not finished yet
+        tracker.storage.load = None     # full load would fail
+        assert watcher.check() == True
+        assert tracker.dates['date'].tolist() == ["2024-01-01", "2024-01-29", "2024-02-26"]
+        assert changes == [tracker]
+
+        with open(csv_file, "a") as f:
+            f.write("-25\n")
+        assert watcher.check() == True
+        assert tracker.dates['date'].tolist()[-1] == "2024-03-25"
+        assert watcher.check() == False
+
+    def test_rewritten_file(self, tmp_path):
+        """Test full reload when the file is overwritten, no callback if the dates are the same"""
+        csv_file = tmp_path / "dates.csv"
+        csv_file.write_text("2024-01-01\n2024-02-01\n")
+        tracker = CycleTracker(csv_file=str(csv_file))
+        changes = []
+        watcher = TrackerWatcher(tracker, on_change=changes.append)
+
+        csv_file.write_text("2024-02-01\n2024-01-01\n")
+        assert watcher.check() == False
+        csv_file.write_text("2024-03-01\n")
+        assert watcher.check() == True
+        assert tracker.dates['date'].tolist() == ["2024-03-01"]
+        assert len(changes) == 1
+
+    def test_thread(self, tmp_path):
+        """Test the background thread notices a change"""
+        csv_file = tmp_path / "dates.csv"
+        csv_file.write_text("2024-01-01\n")
+        tracker = CycleTracker(csv_file=str(csv_file))
+        changes = []
+        watcher = TrackerWatcher(tracker, on_change=changes.append, interval=0.05).start()
+        try:
+            with open(csv_file, "a") as f:
+                f.write("2024-02-01\n")
+            for _ in range(100):
+                if changes:
+                    break
+                time.sleep(0.05)
+        finally:
+            watcher.stop()
+        assert len(changes) == 1
+        assert len(tracker.dates) == 2
+
+    def test_idle_after_change(self, tmp_path):
+        """Test the thread does not wake itself up (it takes the lock file in the same directory)"""
+        csv_file = tmp_path / "dates.csv"
+        csv_file.write_text("2024-01-01\n")
+        tracker = CycleTracker(csv_file=str(csv_file))
+        watcher = TrackerWatcher(tracker, interval=0.05).start()
+        checks = []
+        check = watcher.check
+        watcher.check = lambda: checks.append(check())
+        try:
+            with open(csv_file, "a") as f:
+                f.write("2024-02-01\n")
+            for _ in range(100):
+                if checks:
+                    break
+                time.sleep(0.05)
+            time.sleep(0.5)
+            mode = watcher.mode
+        finally:
+            watcher.stop()
+        assert checks[0] == True
+        # inotify: one check for the append; polling: one check per interval
+        assert len(checks) <= (1 if mode == "inotify" else 20)
+
+    def test_storage_source(self, tmp_path, monkeypatch):
+        """Test the thread watches the directory of the storage, not of the default CSV file"""
+        monkeypatch.chdir(tmp_path)
+        path = str(tmp_path / "store" / "dates.bin")
+        os.makedirs(os.path.dirname(path))
+        tracker = CycleTracker(storage=BinaryStorage(path))
+        changes = []
+        watcher = TrackerWatcher(tracker, on_change=changes.append, interval=2).start()
+        try:
+            CycleTracker(storage=BinaryStorage(path)).add_date("2024-01-01")
+            for _ in range(30):
+                if changes:
+                    break
+                time.sleep(0.05)
+            mode = watcher.mode
+        finally:
+            watcher.stop()
+        if mode == "inotify":       # polling would only check after 2 s
+            assert len(changes) == 1
@@ -0,0 +1,33 @@
+import numpy as np
+from batch import ragged
+from cycle_tracker import CycleTracker
+from forecast import forecast, forecast_batch
+
+class TestForecast:
+    def test_regular_cycles(self):
+        """Test that equal cycles give exact dates"""
+        result = forecast(19000, [28, 28, 28], n_cycles=3, seed=1)
+        assert result['cycle'].tolist() == [1, 2, 3]
+        expected = (19000 + np.array([28, 56, 84])).astype("datetime64[D]")
+        for column in ['pred25', 'pred50', 'pred75']:
+            assert (result[column].to_numpy().astype("datetime64[D]") == expected).all()
+
+    def test_tracker_and_batch(self, tmp_path):
+        """Test seeded tracker forecast, widening bands and the batch version"""
+        rng = np.random.default_rng(3)
+        history = list((19000 + np.cumsum(rng.choice([25, 27, 28, 30, 33], size=20)))
+            .astype("datetime64[D]").astype(str))
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"))
+        tracker.add_dates(history)
+        result = tracker.forecast(n_cycles=12, seed=7)
+        assert result.equals(tracker.forecast(n_cycles=12, seed=7))
+        width = (result['pred75'] - result['pred25']).dt.days
+        assert width.iloc[-1] > width.iloc[0]
+        assert (result['pred50'].diff().dropna().dt.days > 20).all()
+
+        days, offsets = ragged([history, history[:2], []])
+        batch = forecast_batch(days, offsets, n_cycles=12, seed=7)
+        assert batch['pred50'].shape == (3, 12)
+        assert (batch['pred50'][0] == result['pred50'].to_numpy().astype("datetime64[D]")).all()
+        assert np.isnat(batch['pred50'][1:]).all()
+        assert len(CycleTracker(csv_file=str(tmp_path / "empty.csv")).forecast()) == 0
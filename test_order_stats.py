@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from order_stats import SlidingQuantiles, quantile_sorted, rolling_quantile
+
+class TestSlidingQuantiles:
+    def test_matches_pandas(self):
+        """Test quantiles of the sliding window against pandas on the same window"""
+        rng = np.random.default_rng(0)
+        values = rng.integers(20, 40, size=200).astype(float)
+        sliding = SlidingQuantiles(12)
+        for i, value in enumerate(values):
+            sliding.push(value)
+            window = pd.Series(values[max(i - 11, 0):i + 1])
+            for q in [0.1, 0.25, 0.5, 0.75, 0.9]:
+                assert sliding.quantile(q) == window.quantile(q)
+
+    def test_non_dyadic_quantiles(self):
+        """Test quantiles like 0.2 or 0.8 that are not exact in binary (floored into dates later)"""
+        values = [20, 21, 23, 23, 24, 26, 28, 28, 33, 33]
+        assert quantile_sorted(values, 0.8) == 29.0
+        rng = np.random.default_rng(5)
+        for _ in range(500):
+            values = np.sort(rng.integers(20, 40, size=rng.integers(1, 15))).astype(float)
+            for q in [0.1, 0.2, 0.3, 0.7, 0.8, 0.9]:
+                assert quantile_sorted(values, q) == pd.Series(values).quantile(q)
+
+    def test_rolling_quantile(self):
+        """Test rolling median with gaps (NaN) and min_periods like old/predictor.py"""
+        rng = np.random.default_rng(1)
+        values = rng.integers(20, 40, size=100).astype(float)
+        values[rng.random(100) < 0.2] = np.nan
+        expected = pd.Series(values).rolling(window=10, min_periods=2).median()
+        np.testing.assert_allclose(rolling_quantile(values, 10, 0.5, min_periods=2), expected)
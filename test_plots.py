@@ -0,0 +1,54 @@
+import base64
+import io
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from matplotlib.axes import Axes
+import plots
+from cycle_tracker import CycleTracker
+
+# History with two gaps (> gap_max) -> three line segments
+DATES = ["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25", "2024-06-01", "2024-06-29",
+    "2024-07-27", "2024-10-01", "2024-10-30"]
+
+def segment_plot(inputs):
+    """The raw plot as drawn before: one seaborn lineplot per segment between gaps"""
+    style = inputs['style']
+    date = inputs['date'].astype("datetime64[ns]")
+    delta_clean = inputs['delta_clean']
+    sns.set_style("white")
+    sns.set_context("paper")
+    fig, ax = plt.subplots(figsize=inputs['size'])
+    ax.scatter(date, delta_clean, color=style['c_main'])
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Cycle Length (days)")
+    ax.set_ylim(15, 35)
+    ax.set_title("Your data")
+    group = np.cumsum(np.isnan(delta_clean))
+    for g in np.unique(group):
+        segment = (group == g) & ~np.isnan(delta_clean)
+        if segment.any():
+            sns.lineplot(x=date[segment], y=delta_clean[segment],
+                linestyle=':', color=style['c_ring'], legend=False)
+    return plots._png(fig)
+
+def pixels(image):
+    return plt.imread(io.BytesIO(base64.b64decode(image)))
+
+class TestPlots:
+    def test_raw_with_gaps(self, tmp_path, monkeypatch):
+        """Test that a history with gaps is drawn with one ax.plot, same image as one line per segment"""
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"))
+        tracker.add_dates(DATES)
+        inputs = tracker.render_inputs("raw")
+        assert np.isnan(inputs['delta_clean']).sum() == 3
+
+        calls = []
+        plot = Axes.plot
+        monkeypatch.setattr(Axes, "plot", lambda ax, *args, **kwargs: calls.append(args) or plot(ax, *args, **kwargs))
+        image = plots.render_raw(inputs)
+        assert len(calls) == 1
+        np.testing.assert_array_equal(calls[0][1], inputs['delta_clean'])
+        monkeypatch.undo()
+
+        assert (pixels(image) == pixels(segment_plot(inputs))).all()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from batch import predict_batch, ragged
+from cycle_tracker import CycleTracker
+from predictors import PREDICTORS, Predictor, benchmark, get_predictor
+
+def corpus():
+    rng = np.random.default_rng(4)
+    histories = [[], [19000], [19000, 19028], [19000, 19028, 19055, 19083]]
+    for n in [6, 15, 45]:
+        histories.append(19000 + np.cumsum(rng.choice([22, 26, 28, 29, 31, 40, 70], size=n)))
+    return histories
+
+class TestPredictors:
+    def test_batch_matches_incremental(self):
+        """Test that every predictor gives the same result incrementally, after reset and in batch"""
+        histories = corpus()
+        days, offsets = ragged(histories)
+        for name in PREDICTORS:
+            batch = get_predictor(name).predict_batch(days, offsets)
+            for u, history in enumerate(histories):
+                incremental = get_predictor(name)
+                for day in list(history):
+                    incremental.update(day)
+                full = get_predictor(name)
+                full.reset(history)
+                if np.isnan(batch[u]):
+                    assert incremental.predict() is None and full.predict() is None, name
+                else:
+                    assert incremental.predict() == pytest.approx(batch[u]), name
+                    assert full.predict() == pytest.approx(batch[u]), name
+
+    def test_reference_implementations(self, tmp_path):
+        """Test quantile window against predict_batch and rolling median against the tracker"""
+        histories = corpus()
+        days, offsets = ragged(histories)
+        assert np.array_equal(get_predictor("quantile").predict_batch(days, offsets),
+            predict_batch(days, offsets)["delta_50"], equal_nan=True)
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"))
+        tracker.add_dates([str(d) for d in np.asarray(histories[-1]).astype("datetime64[D]")])
+        median = get_predictor("rolling_median").predict_batch(days, offsets)[-1]
+        assert median == tracker.rolling_quantiles()["q50"].iloc[-1]
+        with pytest.raises(ValueError):
+            get_predictor("nonsense")
+
+    def test_benchmark(self):
+        days, offsets = ragged(corpus())
+        result = benchmark(days, offsets, memory_users=3)
+        assert result['predictor'].tolist() == list(PREDICTORS)
+        assert (result['n'] > 0).all()
+        assert (result['bytes_per_user'] > 0).all()
+
+    def test_incomplete_predictor(self):
+        """Test that a predictor missing a method fails when it is created, not when it is used"""
+        class NoBatch(Predictor):
+            def clear(self):
+                self.days = []
+
+            def update(self, day):
+                self.days.append(day)
+
+            def predict(self):
+                return None
+        with pytest.raises(TypeError):
+            NoBatch()
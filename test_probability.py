@@ -0,0 +1,41 @@
+from datetime import date
+import numpy as np
+import pytest
+from batch import ragged
+from cycle_tracker import CycleTracker
+from probability import export_batch, probability_batch
+
+class TestProbabilityTable:
+    def test_tracker_table(self, tmp_path):
+        """Test per-day probabilities from the recent cycles, caching and lookups"""
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"))
+        tracker.add_dates(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25", "2024-04-24"])
+        table = tracker.probability_table(horizon=40)
+        assert tracker.probability_table(horizon=40) is table
+        assert len(table) == 41
+        assert table.probability("2024-05-22") == pytest.approx(0.75)    # 28 days: 3 of 4 cycles
+        assert table.probability(date(2024, 5, 24)) == pytest.approx(0.25)
+        assert table.probability("2024-05-23") == 0
+        assert table.cumulative("2024-05-23") == pytest.approx(0.75)
+        assert table.cumulative("2024-07-01") == pytest.approx(1)
+        assert table.to_frame()['probability'].sum() == pytest.approx(1)
+
+        smooth = tracker.probability_table(horizon=40, bandwidth=1.5)
+        assert 0 < smooth.probability("2024-05-23") < smooth.probability("2024-05-22")
+        assert smooth.pmf.sum() == pytest.approx(1)
+
+        tracker.add_date("2024-05-22")
+        assert tracker.probability_table(horizon=40) is not table
+
+    def test_batch(self, tmp_path):
+        """Test batch tables against the tracker"""
+        history = ["2024-01-01", "2024-01-27", "2024-02-26", "2024-03-25", "2024-04-24"]
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"))
+        tracker.add_dates(history)
+        days, offsets = ragged([history, history[:2]])
+        last, pmf = probability_batch(days, offsets, horizon=50, bandwidth=2)
+        assert np.allclose(pmf[0], tracker.probability_table(horizon=50, bandwidth=2).pmf)
+        assert (pmf[1] == 0).all()
+        export = export_batch(days, offsets, names=["a", "b"], horizon=50)
+        assert export['user'].unique().tolist() == ["a"]
+        assert len(export) == 51
@@ -0,0 +1,42 @@
+import numpy as np
+from cycle_tracker import CycleTracker
+from render_cache import RenderCache, render_key
+
+class TestRenderCache:
+    def test_key(self):
+        """Test that the key changes with every input, also inside arrays"""
+        inputs = {'kind': 'raw', 'delta_clean': np.array([np.nan, 28.0]), 'size': (8, 4)}
+        assert render_key(inputs) == render_key(dict(reversed(list(inputs.items()))))
+        assert render_key(inputs) != render_key({**inputs, 'delta_clean': np.array([np.nan, 29.0])})
+        assert render_key(inputs) != render_key({**inputs, 'size': (8, 5)})
+
+    def test_lru_and_disk(self, tmp_path):
+        cache = RenderCache(max_items=2, directory=str(tmp_path / "renders"))
+        calls = []
+        def renderer(inputs):
+            calls.append(inputs['n'])
+            return f"image {inputs['n']}"
+        for n in [1, 2, 1, 3]:
+            cache.render({'n': n}, renderer)
+        assert calls == [1, 2, 3]
+        assert len(cache) == 2
+        # 2 was evicted from memory (least recently used), but is still on disk
+        other = RenderCache(directory=str(tmp_path / "renders"))
+        assert other.render({'n': 2}, renderer) == "image 2"
+        assert calls == [1, 2, 3]
+
+    def test_tracker_plots(self, tmp_path):
+        """Test that trackers with the same state share the rendered images"""
+        cache = RenderCache()
+        dates = ["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25"]
+        first = CycleTracker(csv_file=str(tmp_path / "a.csv"), render_cache=cache)
+        first.add_dates(dates)
+        second = CycleTracker(csv_file=str(tmp_path / "b.csv"), render_cache=cache)
+        second.add_dates(dates)
+        image = first.plot_pred()
+        assert isinstance(image, str)
+        assert second.plot_pred() is image
+        assert first.plot_raw() is second.plot_raw()
+        assert cache.misses == 2 and cache.hits == 2
+        second.add_date("2024-04-20")
+        assert second.plot_pred() is not image
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from async_tracker import AsyncCycleTracker
+from cycle_tracker import CycleTracker
+from render_cache import RenderCache
+from render_service import RenderService
+import svg_render
+
+class Session:
+    """Owner of the images, like one UI session"""
+
+class TestRenderService:
+    def test_dedupe_and_previous_image(self):
+        """Test that duplicates share one render and the last image is shown while rendering"""
+        release = threading.Event()
+        calls = []
+        def render(inputs):
+            calls.append(inputs['n'])
+            release.wait(5)
+            return f"image {inputs['n']}"
+        service = RenderService(executor=ThreadPoolExecutor(2), cache=RenderCache(), render=render)
+        owner = Session()
+        image, first = service.request(owner, "pred", {'n': 1})
+        assert image is None
+        assert service.submit({'n': 1}) is first
+        release.set()
+        assert first.result() == "image 1"
+        assert calls == [1]
+
+        release.clear()
+        image, second = service.request(owner, "pred", {'n': 2})
+        assert image == "image 1" and not second.done()
+        release.set()
+        assert second.result() == "image 2"
+        assert service.request(owner, "pred", {'n': 2})[0] == "image 2"    # cache hit
+        assert calls == [1, 2]
+        service.shutdown()
+
+    def test_process_pool(self, tmp_path):
+        """Test rendering in worker processes through the async tracker"""
+        service = RenderService(max_workers=1, cache=RenderCache())
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"), renderer="svg")
+        tracker.add_dates(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25"])
+        wrapper = AsyncCycleTracker(tracker, render_service=service)
+        try:
+            image = asyncio.run(wrapper.plot_pred())
+        finally:
+            service.shutdown()
+        assert image == svg_render.render(tracker.render_inputs("pred"))
@@ -0,0 +1,21 @@
+import base64
+from config import c_main, c_ring
+from cycle_tracker import CycleTracker
+from render_cache import RenderCache
+
+class TestSvgRender:
+    def test_svg_renderer(self, tmp_path):
+        """Test SVG plots: colors from config, gaps break the line, separate cache entries"""
+        cache = RenderCache()
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"), render_cache=cache, renderer="svg")
+        tracker.add_dates(["2024-01-01", "2024-01-29", "2024-02-26", "2024-03-25",
+            "2024-06-01", "2024-06-29", "2024-07-27"])
+        pred = base64.b64decode(tracker.plot_pred()).decode()
+        assert pred.startswith("<svg") and c_ring in pred
+        assert "eriod" in pred
+        raw = base64.b64decode(tracker.plot_raw()).decode()
+        assert c_main in raw
+        assert raw.count(' M') + raw.count('"M') == 2     # two line segments around the gap
+        tracker.renderer = "matplotlib"
+        assert tracker.plot_pred() != base64.b64encode(pred.encode()).decode()
+        assert cache.misses == 3
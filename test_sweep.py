@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from backtest import backtest
+from batch import ragged
+from cycle_tracker import CycleTracker
+from sweep import best_params, load_corpus, param_grid, sweep
+
+class TestSweep:
+    def test_sweep(self, tmp_path):
+        """Test parallel sweep gives the same ranking as in-process, results streamed to CSV"""
+        rng = np.random.default_rng(4)
+        histories = [19000 + np.cumsum(rng.choice([25, 27, 28, 30, 33, 60], size=40)) for _ in range(5)]
+        days, offsets = ragged(histories)
+        grid = param_grid(n_window=(12, 36), n_recent=(3, 12), gap_max=(35, 45))
+        out_file = tmp_path / "sweep.csv"
+
+        ranked = sweep(days, offsets, grid, out_file=str(out_file), max_workers=2)
+        serial = sweep(days, offsets, grid, max_workers=0)
+        assert len(ranked) == len(grid)
+        pd.testing.assert_frame_equal(ranked, serial)
+        assert len(pd.read_csv(out_file)) == len(grid)
+        assert ranked['mae'].is_monotonic_increasing
+
+        # The best parameters can be used by the tracker
+        tracker = CycleTracker(csv_file=str(tmp_path / "dates.csv"), **best_params(ranked))
+        assert tracker.n_recent in (3, 12)
+
+    def test_load_corpus(self):
+        """Test loading users' files in different formats"""
+        days, offsets, names = load_corpus(["data/periods.csv", "data/testdata.csv"])
+        assert names == ["periods", "testdata"]
+        assert len(offsets) == 3
+        assert offsets[-1] == len(days)
+
+    def test_non_dyadic_quantiles_match_tracker(self, tmp_path):
+        """Test that the 0.2/0.8 grid configs score what CycleTracker(q_low=0.2, q_high=0.8) predicts,
+        for full recomputes and incremental appends"""
+        days = 19000 + np.cumsum([0, 20, 21, 23, 23, 24, 26, 28, 28, 33, 33, 27])
+        dates = [str(d) for d in days.astype("datetime64[D]")]
+        result = backtest(*ragged([days]), q_low=0.2, q_high=0.8)
+        appended = CycleTracker(csv_file=str(tmp_path / "appended.csv"), q_low=0.2, q_high=0.8)
+        appended.add_dates(dates[:3])
+        for i, row in result.iterrows():
+            origin = int(np.searchsorted(days, (row['origin'] - pd.Timestamp("1970-01-01")).days))
+            tracker = CycleTracker(csv_file=str(tmp_path / f"prefix{i}.csv"), q_low=0.2, q_high=0.8)
+            tracker.add_dates(dates[:origin + 1])
+            while len(appended.dates) < origin + 1:
+                appended.pred75     # statistics up to date -> the next add is incremental
+                appended.add_date(dates[len(appended.dates)])
+            for name, column in [("pred25", 'pred_low'), ("pred50", 'pred50'), ("pred75", 'pred_high')]:
+                assert getattr(tracker, name) == row[column].date(), name
+                assert getattr(appended, name) == row[column].date(), name